@@ -112,6 +112,17 @@ class Core:
         async with Core(access_token="...", url="...") as ran:
             downstream_connection = await ran.downstream.create_connection()
 
+    All API calls of one Core share single connection pool. If you need to tune it (for example, to allow more
+    concurrent requests to the API), you can pass your own :class:`aiohttp.BaseConnector`. Connector is not closed
+    by :meth:`.Core.close`, so Core can be connected again. Close connector, when it is not needed anymore.
+
+    .. code-block:: python
+
+        connector = aiohttp.TCPConnector(limit=200, keepalive_timeout=60)
+        async with Core(access_token="...", url="...", connector=connector) as ran:
+            pass
+        await connector.close()
+
     """
 
     def __init__(
@@ -119,6 +130,7 @@ class Core:
         access_token: str,
         url: t.Optional[t.Union[str, URL]] = None,
         endpoint_schema: t.Optional[RanApiEndpointSchema] = None,
+        connector: t.Optional[aiohttp.BaseConnector] = None,
     ):
         #: Routing table API, created by :meth:`.Core.connect`. Instance of :class:`.RoutingTable`.
         self.routing_table: RoutingTable = None  # type: ignore
@@ -143,6 +155,7 @@ class Core:
             # Unreachable: see checks before.
             raise ValueError("Api endpoints not provided")
 
+        self.__connector = connector
         self.__session: aiohttp.ClientSession = None  # type: ignore
         self._closed = asyncio.Event()
         self._opened = asyncio.Event()
@@ -168,7 +181,12 @@ class Core:
 
             return
 
-        self.__session = aiohttp.ClientSession(headers={"Authorization": f"Bearer {self.__access_token}"})
+        # Custom connector is shared by all sessions, created by this method, so closing session must not close it
+        self.__session = aiohttp.ClientSession(
+            headers={"Authorization": f"Bearer {self.__access_token}"},
+            connector=self.__connector,
+            connector_owner=self.__connector is None,
+        )
         self.routing_table = RoutingTable(self.__session, api_path=self.__api_endpoint_schema.routing)
         self.multicast_groups = MulticastGroupsManagement(self.__session, api_path=self.__api_endpoint_schema.multicast)
         self.upstream = UpstreamConnectionManager(
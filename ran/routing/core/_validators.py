@@ -0,0 +1,11 @@
+UINT32_MAX = 0xFFFFFFFF
+UINT64_MAX = 0xFFFFFFFFFFFFFFFF
+
+
+def is_uint32(n: int) -> bool:
+    # Exact type check, so bool and other int subclasses are rejected
+    return type(n) is int and 0 <= n <= UINT32_MAX
+
+
+def is_uint64(n: int) -> bool:
+    return type(n) is int and 0 <= n <= UINT64_MAX
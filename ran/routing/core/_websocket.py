@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import typing as t
+from contextlib import suppress
+
+import aiohttp
+from yarl import URL
+
+from .buffer import BufferClosed, MessageBuffer
+
+T = t.TypeVar("T")
+
+# WSMsgType members are singletons, so frames are dispatched with identity checks.
+WS_TEXT = aiohttp.WSMsgType.TEXT
+WS_BINARY = aiohttp.WSMsgType.BINARY
+WS_CLOSE = aiohttp.WSMsgType.CLOSE
+WS_CLOSED = aiohttp.WSMsgType.CLOSED
+
+
+def ws_url(api_path: URL, access_token: str) -> URL:
+    # Query string is encoded once per connection, instead of on every ws_connect call
+    return api_path.update_query(access_token=access_token)
+
+
+def schedule_ws_close(ws: t.Optional[aiohttp.ClientWebSocketResponse]) -> t.Optional[asyncio.Future]:
+    """
+    Schedules closing of connection websocket, if it is still open.
+
+    Connection listener is blocked in ``ws.receive()`` and checks connection stop flag only between received frames,
+    nobody waits on that flag. Closing websocket wakes listener up. Connection must keep returned task and pass it to
+    :func:`wait_ws_close` in listener.
+
+    :param ws: websocket of connection, None if it is not established
+    :type ws: t.Optional[aiohttp.ClientWebSocketResponse]
+    :return: websocket closing task, or None if there is nothing to close
+    :rtype: t.Optional[asyncio.Future]
+    """
+    if ws is None or ws.closed:
+        return None
+    return asyncio.ensure_future(ws.close())
+
+
+async def wait_ws_close(close_task: t.Optional[asyncio.Future], log_prefix: str) -> None:
+    """
+    Waits for websocket closing task, scheduled by :func:`schedule_ws_close`. Listener calls it before connection is
+    reported as closed, so closing handshake is finished when ``wait_closed()`` returns. Errors are logged.
+
+    :param close_task: websocket closing task, or None if websocket closing was not scheduled
+    :type close_task: t.Optional[asyncio.Future]
+    :param log_prefix: connection prefix for log messages
+    :type log_prefix: str
+    """
+    if close_task is None:
+        return
+    try:
+        await close_task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        logging.exception("%s Failed to close websocket", log_prefix)
+
+
+async def drain_buffer(buffer: MessageBuffer[T]) -> t.AsyncGenerator[T, None]:
+    """
+    Yields messages from buffer, until it is closed and empty.
+
+    :param buffer: buffer of connection, closed together with connection
+    :type buffer: MessageBuffer[T]
+    :yield: buffered messages
+    """
+    while True:
+        # Already buffered messages (including ones, left after close) are taken without awaiting.
+        if not buffer.empty():
+            yield buffer.get_nowait()
+            continue
+
+        # Buffer is closed together with connection, it will interrupt waiting.
+        try:
+            message = await buffer.get()
+        except BufferClosed:
+            return
+        yield message
+
+
+async def recv_from_buffer(buffer: MessageBuffer[T], timeout: t.Optional[float], connecting: bool) -> t.Optional[T]:
+    """
+    Takes one message from buffer.
+
+    :param buffer: buffer of connection, closed together with connection
+    :type buffer: MessageBuffer[T]
+    :param timeout: how long to wait for message, if None - wait until message received or buffer closed
+    :type timeout: t.Optional[float]
+    :param connecting: connection is not established yet
+    :type connecting: bool
+    :return: message, or None on timeout, on closed buffer, or when there is nothing to wait for
+    :rtype: t.Optional[T]
+    """
+    if not buffer.empty():
+        return buffer.get_nowait()
+
+    # Connection is not established yet, so there is nothing to wait for.
+    if timeout is None and connecting:
+        return None
+
+    with suppress(asyncio.TimeoutError, BufferClosed):
+        if timeout is None:
+            return await buffer.get()
+        return await asyncio.wait_for(buffer.get(), timeout=timeout)
+
+    return None
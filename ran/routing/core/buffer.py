@@ -0,0 +1,104 @@
+import asyncio
+import typing as t
+from collections import deque
+
+T = t.TypeVar("T")
+
+
+class BufferClosed(Exception):
+    """
+    Raised by :meth:`MessageBuffer.get`, when buffer is closed and all stored messages are already taken.
+    """
+
+    pass
+
+
+class MessageBuffer(t.Generic[T]):
+    """
+    Lightweight replacement of :class:`asyncio.Queue` for received messages.
+
+    Buffer is used by upstream and downstream connections. It is designed for single producer (websocket listener)
+    and one or more consumers. Items are stored in plain
+    deque, so there is no unfinished tasks accounting. Producer waits on single future, when buffer is full.
+    After :meth:`close` all remaining messages still can be read, then :class:`BufferClosed` is raised.
+
+    :param maxsize: Max amount of stored messages, if less or equal to zero, buffer size is unlimited.
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self._maxsize = maxsize
+        self._items: t.Deque[T] = deque()
+        self._getters: t.Deque[asyncio.Future] = deque()
+        self._putter: t.Optional[asyncio.Future] = None
+        self._closed = False
+
+    @staticmethod
+    def _wakeup(waiter: t.Optional[asyncio.Future]) -> None:
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _wakeup_getter(self) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def close(self) -> None:
+        self._closed = True
+        # Wake up all waiting consumers, they will raise BufferClosed
+        while self._getters:
+            self._wakeup(self._getters.popleft())
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return 0 < self._maxsize <= len(self._items)
+
+    def put_nowait(self, item: T) -> None:
+        if self.full():
+            raise asyncio.QueueFull
+        self._items.append(item)
+        self._wakeup_getter()
+
+    async def put(self, item: T) -> None:
+        while self.full():
+            self._putter = asyncio.get_running_loop().create_future()
+            await self._putter
+        self.put_nowait(item)
+
+    def get_nowait(self) -> T:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        item = self._items.popleft()
+        self._wakeup(self._putter)
+        return item
+
+    async def get(self) -> T:
+        while not self._items:
+            if self._closed:
+                raise BufferClosed("Buffer is closed")
+
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                # This getter was woken up, but cancelled at the same time, so pass wakeup to the next one.
+                if self._items and not getter.cancelled():
+                    self._wakeup_getter()
+                raise
+        return self.get_nowait()
@@ -2,13 +2,23 @@ import asyncio
 import logging
 import os
 import typing as t
-from contextlib import suppress
 
 import aiohttp
-import async_timeout
 from yarl import URL
 
 from ran.routing.core import domains, serializers
+from ran.routing.core._websocket import (
+    WS_BINARY,
+    WS_CLOSE,
+    WS_CLOSED,
+    WS_TEXT,
+    drain_buffer,
+    recv_from_buffer,
+    schedule_ws_close,
+    wait_ws_close,
+    ws_url,
+)
+from ran.routing.core.buffer import MessageBuffer
 
 from . import consts, exceptions
 
@@ -35,25 +45,34 @@ class DownstreamConnection:
     :type session: aiohttp.ClientSession
     :param api_path: downstream API path
     :type api_path: URL
-    :param buffer_size: Size of internal Queue, used to store messages from ws
+    :param buffer_size: Size of internal buffer, used to store messages from ws,
         recommended value is at least the number of workers reading data from the stream
     :type buffer_size: int
+    :param compress: Window bits for permessage-deflate, offered to the server on connect, defaults to 0 (disabled).
+        Compression saves traffic, but costs CPU time for every frame.
+    :type compress: int
     """
 
-    def __init__(self, access_token: str, session: aiohttp.ClientSession, api_path: URL, buffer_size: int):
+    def __init__(
+        self, access_token: str, session: aiohttp.ClientSession, api_path: URL, buffer_size: int, compress: int = 0
+    ):
         self._identifier = os.urandom(8).hex()
         self._session = session
-        self.__access_token = access_token
         self.__api_path = api_path
+        self.__ws_url = ws_url(api_path, access_token)
+        self._compress = compress
 
-        self._downstream_buffer: asyncio.Queue = asyncio.Queue(buffer_size)
+        self._downstream_buffer: MessageBuffer[
+            t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]
+        ] = MessageBuffer(buffer_size)
 
         self._listener_task: t.Optional[asyncio.Future] = None
 
-        self._stop_event = asyncio.Event()
+        self._stopping = False
         self._closed: asyncio.Future[t.Optional[str]] = asyncio.Future()
         self._opened = asyncio.Event()
         self._ws: t.Optional[aiohttp.client.ClientWebSocketResponse] = None
+        self._ws_close_task: t.Optional[asyncio.Future] = None
 
     async def _send_to_ws(self, data: t.Union[str, bytes]) -> bool:
         """
@@ -221,7 +240,7 @@ class DownstreamConnection:
             target_dev_addr=target_dev_addr,
         )
 
-    async def stream(
+    def stream(
         self, timeout: int = 1
     ) -> t.AsyncIterator[t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]]:
         """
@@ -248,22 +267,12 @@ class DownstreamConnection:
                 assert isinstance(message, domains.DownstreamMessage)  # not necessary, just for example
                 await handle_message(message)
 
-        :param timeout: timeout between reading attempts, defaults to 1
+        :param timeout: not used, stream is woken up on new message or connection close. Kept for compatibility.
         :type timeout: int, optional
         :yield: domains.DownstreamMessage
         :rtype: t.AsyncIterator[domains.DownstreamMessage]
         """
-        while not self.is_closed():
-            with suppress(asyncio.TimeoutError):
-                data_message = None
-                async with async_timeout.timeout(timeout):
-                    data_message = await self._downstream_buffer.get()
-                if data_message is not None:
-                    yield data_message
-
-        # Read all items from buffer, when stream already closed.
-        for _ in range(self._downstream_buffer.qsize()):
-            yield await self._downstream_buffer.get()
+        return drain_buffer(self._downstream_buffer)
 
     async def recv(
         self, timeout: t.Optional[int] = None
@@ -285,32 +294,11 @@ class DownstreamConnection:
         :rtype: t.Optional[t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]]
         """
 
-        # If messages are already in buffer - return them. In other case - check closed state and raise an exception.
-        if not self._downstream_buffer.empty():
-            return await self._downstream_buffer.get()
-
-        if timeout is None:
-            recv_data_task = asyncio.create_task(self._downstream_buffer.get())
-
-            _, pending = await asyncio.wait(
-                {asyncio.create_task(self.wait_closed()), recv_data_task},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-
-            pending_task = pending.pop()
-            pending_task.cancel()
-
-            try:
-                await pending_task
-            except asyncio.CancelledError:
-                pass
-
-            if pending_task != recv_data_task:
-                return recv_data_task.result()
-
-        else:
-            with suppress(asyncio.TimeoutError):
-                return await asyncio.wait_for(self._downstream_buffer.get(), timeout=timeout)
+        message = await recv_from_buffer(
+            self._downstream_buffer, timeout, connecting=not self.is_opened() and not self.is_closed()
+        )
+        if message is not None:
+            return message
 
         return self._raise_on_closed(force_raise_if_closed=True)
 
@@ -357,38 +345,35 @@ class DownstreamConnection:
                 f"Starting listener for downstream websocket connection ws[{self._identifier}] to"
                 f" {str(self.__api_path)!r}"
             )
-            query_params = {"access_token": self.__access_token}
-            async with self._session.ws_connect(self.__api_path, params=query_params) as ws:
+            async with self._session.ws_connect(self.__ws_url, compress=self._compress) as ws:
                 self._ws = ws
                 self._opened.set()
                 logging.debug(f"Downstream websocket connection ws[{self._identifier}] established")
 
-                while not self._stop_event.is_set():
-                    with suppress(asyncio.TimeoutError):
-                        ws_msg = await ws.receive(timeout=1)
-
-                        logging.debug(f"Received from downstream ws[{self._identifier}] message: {ws_msg}")
-                        if ws_msg.type in {aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT}:
-                            try:
-                                downstream = serializers.json.DownstreamAckOrResultSerializer.parse(ws_msg.data)
-                            except serializers.ValidationError as e:
-                                logging.error(
-                                    f"Received downstream from ws[{self._identifier}] broken message:"
-                                    f" {ws_msg.data}\r\nErrors: {e.errors()}"
-                                )
-                                continue
-
-                            # NOTE: this method will block thread forever if downstream_buffer is full.
-                            await self._downstream_buffer.put(downstream)
-                        elif ws_msg.type == aiohttp.WSMsgType.CLOSE:
-                            close_result = (
-                                f"Connection closed with ws closed_code: {ws_msg.data}; reason: {ws_msg.extra}"
+                while not self._stopping:
+                    ws_msg = await ws.receive()
+
+                    logging.debug("Received from downstream ws[%s] message: %s", self._identifier, ws_msg)
+                    msg_type = ws_msg.type
+                    if msg_type is WS_TEXT or msg_type is WS_BINARY:
+                        try:
+                            downstream = serializers.json.DownstreamAckOrResultSerializer.parse(ws_msg.data)
+                        except serializers.ValidationError as e:
+                            logging.error(
+                                f"Received downstream from ws[{self._identifier}] broken message:"
+                                f" {ws_msg.data}\r\nErrors: {e.errors()}"
                             )
-                        elif ws_msg.type == aiohttp.WSMsgType.CLOSED:
-                            if close_result is None:
-                                close_result = "Connection closed due to unknown network reason"
-                            logging.warning(f"ws[{self._identifier}] Connection closed")
-                            return
+                            continue
+
+                        # NOTE: this method will block thread forever if downstream_buffer is full.
+                        await self._downstream_buffer.put(downstream)
+                    elif msg_type is WS_CLOSE:
+                        close_result = f"Connection closed with ws closed_code: {ws_msg.data}; reason: {ws_msg.extra}"
+                    elif msg_type is WS_CLOSED:
+                        if close_result is None:
+                            close_result = "Connection closed due to unknown network reason"
+                        logging.warning(f"ws[{self._identifier}] Connection closed")
+                        return
 
             logging.debug(f"Stopped listener for downstream websocket connection ws[{self._identifier}]")
         except aiohttp.client_exceptions.WSServerHandshakeError as e:
@@ -410,9 +395,12 @@ class DownstreamConnection:
             close_result = "Connection closed due to internal error"
             raise
         finally:
+            await wait_ws_close(self._ws_close_task, f"ws[{self._identifier}]")
+
             self._opened.clear()
             self._ws = None
             self._closed.set_result(close_result)
+            self._downstream_buffer.close()
 
             logging.debug(f"Closed event set for downstream websocket connection ws[{self._identifier}]")
 
@@ -420,7 +408,9 @@ class DownstreamConnection:
         """
         Close downstream connection.
         """
-        self._stop_event.set()
+        self._stopping = True
+        if self._ws_close_task is None:
+            self._ws_close_task = schedule_ws_close(self._ws)
         logging.debug(f"Closing downstream connection ws[{self._identifier}]")
 
     def is_opened(self) -> bool:
@@ -5,18 +5,30 @@ from .connection import DownstreamConnection
 
 
 class DownstreamConnectionManager:
+    """
+    Factory of :class:`.DownstreamConnection` objects. All connections, created by one manager, share single
+    :class:`aiohttp.ClientSession` and its connection pool, so session must outlive all created connections.
+
+    :param access_token: access token for downstream API
+    :type access_token: str
+    :param session: shared ClientSession object
+    :type session: aiohttp.ClientSession
+    :param api_path: downstream API path
+    :type api_path: URL
+    """
+
     def __init__(self, access_token: str, session: aiohttp.ClientSession, api_path: URL):
         self.__access_token = access_token
         self.__session = session
         self.__api_path = api_path
 
-    async def create_connection(self, buffer_size: int = 1) -> DownstreamConnection:
-        downstream_connection = DownstreamConnection(
-            self.__access_token, self.__session, self.__api_path, buffer_size=buffer_size
-        )
+    async def create_connection(self, buffer_size: int = 1, compress: int = 0) -> DownstreamConnection:
+        downstream_connection = self(buffer_size=buffer_size, compress=compress)
         await downstream_connection.connect()
 
         return downstream_connection
 
-    def __call__(self, buffer_size: int = 1) -> DownstreamConnection:
-        return DownstreamConnection(self.__access_token, self.__session, self.__api_path, buffer_size=buffer_size)
+    def __call__(self, buffer_size: int = 1, compress: int = 0) -> DownstreamConnection:
+        return DownstreamConnection(
+            self.__access_token, self.__session, self.__api_path, buffer_size=buffer_size, compress=compress
+        )
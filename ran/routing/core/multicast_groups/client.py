@@ -7,6 +7,7 @@ import aiohttp
 from aiohttp.client_exceptions import ContentTypeError
 from yarl import URL
 
+from ran.routing.core._validators import is_uint32, is_uint64
 from ran.routing.core.domains import MulticastGroup
 
 from . import exceptions
@@ -80,18 +81,6 @@ class MulticastGroupsManagement:
             devices=[map_int(d) for d in mg_dict["devices"]],
         )
 
-    @staticmethod
-    def _is_uint32(n: int) -> bool:
-        if not isinstance(n, int):
-            return False
-        return 0 <= n <= 0xFFFFFFFF
-
-    @staticmethod
-    def _is_uint64(n: int) -> bool:
-        if not isinstance(n, int):
-            return False
-        return 0 <= n <= 0xFFFFFFFFFFFFFFFF
-
     async def create_multicast_group(self, name: str, addr: int) -> MulticastGroup:
         """
         Create new multicast group.
@@ -108,7 +97,7 @@ class MulticastGroupsManagement:
         :return: Created multicast group info.
         :rtype: MulticastGroup
         """
-        if not self._is_uint32(addr):
+        if not is_uint32(addr):
             raise exceptions.ParameterError("'addr' must be of type uint32")
         if not isinstance(name, str) or len(name) > 255:
             raise exceptions.ParameterError("'name' must can be sting, less then 255 characters")
@@ -142,7 +131,7 @@ class MulticastGroupsManagement:
         :return: Updated multicast group info.
         :rtype: MulticastGroup
         """
-        if not self._is_uint32(addr):
+        if not is_uint32(addr):
             raise exceptions.ParameterError("'addr' must be of type uint32")
 
         if new_name is None and new_addr is None:
@@ -155,7 +144,7 @@ class MulticastGroupsManagement:
             json_body["update"]["name"] = new_name
 
         if new_addr is not None:
-            if not self._is_uint32(new_addr):
+            if not is_uint32(new_addr):
                 raise exceptions.ParameterError("'new_addr' must be of type uint32")
             json_body["update"]["addr"] = f"{new_addr:08x}"
 
@@ -184,7 +173,7 @@ class MulticastGroupsManagement:
             "addrs": [],
         }
         for idx, addr in enumerate(addrs):
-            if not self._is_uint32(addr):
+            if not is_uint32(addr):
                 raise exceptions.ParameterError(f"addr #{idx} must be of type uint32")
             json_body["addrs"].append(f"{addr:08x}")
 
@@ -213,7 +202,7 @@ class MulticastGroupsManagement:
         }
 
         for idx, addr in enumerate(addrs):
-            if not self._is_uint32(addr):
+            if not is_uint32(addr):
                 raise exceptions.ParameterError(f"addr #{idx} must be of type uint32")
             json_body["addrs"].append(f"{addr:08x}")
 
@@ -242,9 +231,9 @@ class MulticastGroupsManagement:
         :return: Is device added to multicast group
         :rtype: bool
         """
-        if not self._is_uint32(addr):
+        if not is_uint32(addr):
             raise exceptions.ParameterError("'addr' must be of type uint32")
-        if not self._is_uint64(dev_eui):
+        if not is_uint64(dev_eui):
             raise exceptions.ParameterError("'dev_eui' must be of type uint64")
 
         json_body = {"addr": f"{addr:08x}", "dev_eui": f"{dev_eui:016x}"}
@@ -271,9 +260,9 @@ class MulticastGroupsManagement:
         :return: Is device removed from multicast group.
         :rtype: bool
         """
-        if not self._is_uint32(addr):
+        if not is_uint32(addr):
             raise exceptions.ParameterError("'addr' must be of type uint32")
-        if not self._is_uint64(dev_eui):
+        if not is_uint64(dev_eui):
             raise exceptions.ParameterError("'dev_eui' must be of type uint64")
 
         json_body = {"addr": f"{addr:08x}", "dev_eui": f"{dev_eui:016x}"}
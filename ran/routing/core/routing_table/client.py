@@ -7,6 +7,7 @@ import aiohttp
 from aiohttp.client_exceptions import ContentTypeError
 from yarl import URL
 
+from ran.routing.core._validators import is_uint32, is_uint64
 from ran.routing.core.domains import Device
 
 from . import exceptions
@@ -81,18 +82,6 @@ class RoutingTable:
             details=device_dict["Details"],
         )
 
-    @staticmethod
-    def _is_uint32(n: int) -> bool:
-        if not isinstance(n, int):
-            return False
-        return 0 <= n <= 0xFFFFFFFF
-
-    @staticmethod
-    def _is_uint64(n: int) -> bool:
-        if not isinstance(n, int):
-            return False
-        return 0 <= n <= 0xFFFFFFFFFFFFFFFF
-
     async def insert(self, dev_eui: int, join_eui: t.Optional[int] = None, dev_addr: t.Optional[int] = None) -> Device:
         """
         Insert device into the routing table to start receiving messages from the
@@ -121,7 +110,7 @@ class RoutingTable:
         """
 
         # Validation
-        if not self._is_uint64(dev_eui):
+        if not is_uint64(dev_eui):
             raise exceptions.ParameterError("dev_eui must be of type uint64")
 
         if join_eui is None and dev_addr is None:
@@ -129,21 +118,21 @@ class RoutingTable:
                 "One of the following values must be specified: join_eui (for OTAA device) or dev_addr (for ABP device)"
             )
 
-        json_body = {
-            "DevEUI": f"{dev_eui:016x}",
-        }
-
-        if join_eui is not None:
-            if not self._is_uint64(join_eui):
-                raise exceptions.ParameterError("join_eui must be of type uint64")
-
-            json_body["JoinEUI"] = f"{join_eui:016x}"
+        if join_eui is not None and not is_uint64(join_eui):
+            raise exceptions.ParameterError("join_eui must be of type uint64")
 
-        if dev_addr is not None:
-            if not self._is_uint32(dev_addr):
-                raise exceptions.ParameterError("dev_addr must be of type uint32")
+        if dev_addr is not None and not is_uint32(dev_addr):
+            raise exceptions.ParameterError("dev_addr must be of type uint32")
 
-            json_body["DevAddr"] = f"{dev_addr:08x}"
+        json_body = {
+            key: value
+            for key, value in (
+                ("DevEUI", f"{dev_eui:016x}"),
+                ("JoinEUI", None if join_eui is None else f"{join_eui:016x}"),
+                ("DevAddr", None if dev_addr is None else f"{dev_addr:08x}"),
+            )
+            if value is not None
+        }
 
         async with self._client_session.post(self.__api_path / "devices" / "insert", json=json_body) as response:
             if not response.ok:
@@ -182,7 +171,7 @@ class RoutingTable:
             query_params["DevEUIs"] = []
             # validation
             for idx, dev_eui in enumerate(dev_euis):
-                if not self._is_uint64(dev_eui):
+                if not is_uint64(dev_eui):
                     raise exceptions.ParameterError(f"dev_eui #{idx} must be of type uint64")
                 query_params["DevEUIs"].append(f"{dev_eui:016x}")
 
@@ -203,7 +192,7 @@ class RoutingTable:
             if not response.ok:
                 await self._handle_http_error(response)
 
-            return [self._parse_device_dict(d) for d in await response.json()]
+            return list(map(self._parse_device_dict, await response.json()))
 
     async def update(
         self,
@@ -245,31 +234,31 @@ class RoutingTable:
         :rtype: Device
         """
 
-        if not self._is_uint64(dev_eui):
+        if not is_uint64(dev_eui):
             raise exceptions.ParameterError("dev_eui must be of type uint64")
 
-        if not self._is_uint64(join_eui):
+        if not is_uint64(join_eui):
             raise exceptions.ParameterError("join_eui must be of type uint64")
 
-        json_body = {
-            "DevEUI": f"{dev_eui:016x}",
-            "JoinEUI": f"{join_eui:016x}",
-        }
-
         if active_dev_addr is None and target_dev_addr is None:
             raise exceptions.ParameterError("target_dev_addr and active_dev_addr cannot be both null")
 
-        if active_dev_addr is not None:
-            if not self._is_uint32(active_dev_addr):
-                raise exceptions.ParameterError("dev_addr must be of type uint32")
+        if active_dev_addr is not None and not is_uint32(active_dev_addr):
+            raise exceptions.ParameterError("dev_addr must be of type uint32")
 
-            json_body["ActiveDevAddr"] = f"{active_dev_addr:08x}"
+        if target_dev_addr is not None and not is_uint32(target_dev_addr):
+            raise exceptions.ParameterError("target_dev_addr must be of type uint32")
 
-        if target_dev_addr is not None:
-            if not self._is_uint32(target_dev_addr):
-                raise exceptions.ParameterError("target_dev_addr must be of type uint32")
-
-            json_body["TargetDevAddr"] = f"{target_dev_addr:08x}"
+        json_body = {
+            key: value
+            for key, value in (
+                ("DevEUI", f"{dev_eui:016x}"),
+                ("JoinEUI", f"{join_eui:016x}"),
+                ("ActiveDevAddr", None if active_dev_addr is None else f"{active_dev_addr:08x}"),
+                ("TargetDevAddr", None if target_dev_addr is None else f"{target_dev_addr:08x}"),
+            )
+            if value is not None
+        }
 
         async with self._client_session.post(self.__api_path / "devices" / "update", json=json_body) as response:
             if not response.ok:
@@ -299,7 +288,7 @@ class RoutingTable:
         }
 
         for idx, dev_eui in enumerate(dev_euis):
-            if not self._is_uint64(dev_eui):
+            if not is_uint64(dev_eui):
                 raise exceptions.ParameterError(f"dev_eui #{idx} must be of type uint64")
             json_body["DevEUIs"].append(f"{dev_eui:016x}")
 
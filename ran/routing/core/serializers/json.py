@@ -1,10 +1,16 @@
 import json
 import re
 import typing as t
-from functools import partial
+from functools import lru_cache, partial
 
 from pydantic import BaseModel
 
+try:
+    # orjson is optional, but much faster
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 from ran.routing.core import domains
 
 from .interface import ISerializer
@@ -12,6 +18,22 @@ from .interface import ISerializer
 T = t.TypeVar("T", bound=BaseModel)
 
 
+def orjson_dumps(obj: t.Any) -> str:
+    # orjson produces bytes, decoded to str, so messages are still sent as TEXT websocket frames
+    return orjson.dumps(obj).decode()
+
+
+# Same compact output as orjson, without whitespace after separators
+stdlib_json_dumps = partial(json.dumps, separators=(",", ":"))
+
+if orjson is not None:
+    json_dumps: t.Callable[[t.Any], str] = orjson_dumps
+    json_loads: t.Callable[[t.Union[str, bytes]], t.Any] = orjson.loads
+else:
+    json_dumps = stdlib_json_dumps
+    json_loads = json.loads
+
+
 # Helpers
 def to_bytearray(field_name, domain_dict: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
     domain_dict[field_name] = bytes(domain_dict[field_name])
@@ -23,74 +45,64 @@ def from_bytearray(field_name, domain_dict: t.Dict[str, t.Any]) -> t.Dict[str, t
     return domain_dict
 
 
-def cast_keys_to_snake_case(model_dict: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
-    rules = {
-        "DevEUI": "dev_eui",
-        "DevEUIs": "dev_euis",
-        "JoinEUI": "join_eui",
-        "TransactionID": "transaction_id",
-        "MailboxID": "mailbox_id",
-        "PHYPayload": "phy_payload",
-        "PHYPayloadNoMIC": "phy_payload_no_mic",
-        "MIC": "mic",
-        "MICChallenge": "mic_challenge",
-        "LoRa": "lora",
-        "FSK": "fsk",
-        "FHSS": "fhss",
-        "RSSI": "rssi",
-        "SNR": "snr",
-        "TMMS": "tmms",
-        "GPS": "gps",
-    }
-
-    for key in list(model_dict.keys()):
-        if key in rules:
-            snake_key = rules[key]
-        else:
-            snake_key = re.sub("(?!^)([A-Z]+)", r"_\1", key).lower()
-
-        val = model_dict.pop(key)
-        if isinstance(val, dict):
-            val = cast_keys_to_snake_case(val)
-
-        model_dict[snake_key] = val
+SNAKE_CASE_RULES = {
+    "DevEUI": "dev_eui",
+    "DevEUIs": "dev_euis",
+    "JoinEUI": "join_eui",
+    "TransactionID": "transaction_id",
+    "MailboxID": "mailbox_id",
+    "PHYPayload": "phy_payload",
+    "PHYPayloadNoMIC": "phy_payload_no_mic",
+    "MIC": "mic",
+    "MICChallenge": "mic_challenge",
+    "LoRa": "lora",
+    "FSK": "fsk",
+    "FHSS": "fhss",
+    "RSSI": "rssi",
+    "SNR": "snr",
+    "TMMS": "tmms",
+    "GPS": "gps",
+}
+CAMEL_CASE_RULES = {snake_key: camel_key for camel_key, snake_key in SNAKE_CASE_RULES.items()}
+
+
+# Bounded, so arbitrary keys from received messages can't grow caches without limit.
+# Protocol field names are far fewer than that, so they all stay cached.
+@lru_cache(maxsize=256)
+def to_snake_case(key: str) -> str:
+    if key in SNAKE_CASE_RULES:
+        return SNAKE_CASE_RULES[key]
+    return re.sub("(?!^)([A-Z]+)", r"_\1", key).lower()
+
+
+@lru_cache(maxsize=256)
+def to_camel_case(key: str) -> str:
+    if key in CAMEL_CASE_RULES:
+        return CAMEL_CASE_RULES[key]
+    return key.title().replace("_", "")
+
+
+def cast_keys(model_dict: t.Dict[str, t.Any], cast_key: t.Callable[[str], str]) -> t.Dict[str, t.Any]:
+    # Walks nested dicts with an explicit stack and renames keys in-place
+    stack = [model_dict]
+    while stack:
+        current = stack.pop()
+        for key in list(current.keys()):
+            val = current.pop(key)
+            if isinstance(val, dict):
+                stack.append(val)
+
+            current[cast_key(key)] = val
 
     return model_dict
 
 
-def cast_keys_to_camel_case(model_dict: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
-    rules = {
-        "dev_eui": "DevEUI",
-        "dev_euis": "DevEUIs",
-        "join_eui": "JoinEUI",
-        "transaction_id": "TransactionID",
-        "mailbox_id": "MailboxID",
-        "phy_payload": "PHYPayload",
-        "phy_payload_no_mic": "PHYPayloadNoMIC",
-        "mic": "MIC",
-        "mic_challenge": "MICChallenge",
-        "lora": "LoRa",
-        "fsk": "FSK",
-        "fhss": "FHSS",
-        "rssi": "RSSI",
-        "snr": "SNR",
-        "tmms": "TMMS",
-        "gps": "GPS",
-    }
-
-    for key in list(model_dict.keys()):
-        if key in rules:
-            camel_key = rules[key]
-        else:
-            camel_key = key.title().replace("_", "")
-
-        val = model_dict.pop(key)
-        if isinstance(val, dict):
-            val = cast_keys_to_camel_case(val)
+def cast_keys_to_snake_case(model_dict: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    return cast_keys(model_dict, to_snake_case)
 
-        model_dict[camel_key] = val
 
-    return model_dict
+def cast_keys_to_camel_case(model_dict: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    return cast_keys(model_dict, to_camel_case)
 
 
 # Models
@@ -106,20 +118,20 @@ class GenericJSONSerializer(ISerializer[T]):
         self.extra_serialize = extra_serialize
 
     def parse(self, data: t.Union[str, bytes]) -> T:
-        domain_dict = cast_keys_to_snake_case(json.loads(data))
+        domain_dict = cast_keys_to_snake_case(json_loads(data))
 
         if self.extra_parse is not None:
             domain_dict = self.extra_parse(domain_dict)
 
         return self.model(**domain_dict)
 
-    def serialize(self, message: T) -> t.Union[str, bytes]:
+    def serialize(self, message: T) -> str:
         domain_dict = message.dict(exclude_none=True)
 
         if self.extra_serialize is not None:
             domain_dict = self.extra_serialize(domain_dict)
 
-        return json.dumps(cast_keys_to_camel_case(domain_dict))
+        return json_dumps(cast_keys_to_camel_case(domain_dict))
 
 
 UpstreamAckMessageSerializer: GenericJSONSerializer[domains.UpstreamAckMessage] = GenericJSONSerializer(
@@ -149,10 +161,22 @@ MulticastDownstreamMessageSerializer: GenericJSONSerializer[domains.MulticastDow
 )
 
 
+@lru_cache(maxsize=None)
+def upstream_ack_template(protocol_version: int) -> str:
+    # Fixed-shape UpstreamAck, only "TransactionID", "DevEUI" and "MIC" must be filled with "%" operator
+    return '{"ProtocolVersion":%d,"TransactionID":%%d,"DevEUI":%%d,"MIC":%%d}' % protocol_version
+
+
+@lru_cache(maxsize=None)
+def upstream_reject_template(protocol_version: int, result_code: domains.UpstreamRejectResultCode) -> str:
+    # Fixed-shape UpstreamReject with result code already in place, only "TransactionID" must be filled with "%"
+    return '{"ProtocolVersion":%d,"TransactionID":%%d,"ResultCode":"%s"}' % (protocol_version, result_code.value)
+
+
 class DownstreamAckOrResultSerializer(ISerializer):
     @staticmethod
     def parse(data: t.Union[str, bytes]) -> t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]:
-        domain_dict = cast_keys_to_snake_case(json.loads(data))
+        domain_dict = cast_keys_to_snake_case(json_loads(data))
 
         if "result_code" in domain_dict:
             model = domains.DownstreamResultMessage
@@ -162,7 +186,5 @@ class DownstreamAckOrResultSerializer(ISerializer):
         return model(**domain_dict)
 
     @staticmethod
-    def serialize(
-        message: t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]
-    ) -> t.Union[str, bytes]:
-        return json.dumps(cast_keys_to_camel_case(message.dict(exclude_none=True)))
+    def serialize(message: t.Union[domains.DownstreamAckMessage, domains.DownstreamResultMessage]) -> str:
+        return json_dumps(cast_keys_to_camel_case(message.dict(exclude_none=True)))
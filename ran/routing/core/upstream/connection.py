@@ -5,13 +5,37 @@ import typing as t
 from contextlib import suppress
 
 import aiohttp
-import async_timeout
 from yarl import URL
 
 from ran.routing.core import domains, serializers
+from ran.routing.core._validators import is_uint32, is_uint64
+from ran.routing.core._websocket import (
+    WS_BINARY,
+    WS_CLOSE,
+    WS_CLOSED,
+    WS_TEXT,
+    drain_buffer,
+    recv_from_buffer,
+    schedule_ws_close,
+    wait_ws_close,
+    ws_url,
+)
+from ran.routing.core.buffer import MessageBuffer
 
 from . import consts, exceptions
 
+_NOT_ESTABLISHED = "UpstreamConnection has not yet been established"
+
+
+def _is_valid_ack(transaction_id: int, dev_eui: int, mic: int) -> bool:
+    return type(transaction_id) is int and transaction_id > 0 and is_uint64(dev_eui) and is_uint32(mic)
+
+
+def _is_valid_reject(transaction_id: int, result_code: domains.UpstreamRejectResultCode) -> bool:
+    return (
+        type(transaction_id) is int and transaction_id > 0 and isinstance(result_code, domains.UpstreamRejectResultCode)
+    )
+
 
 class UpstreamConnection:
     """
@@ -31,47 +55,76 @@ class UpstreamConnection:
     :type session: aiohttp.ClientSession
     :param api_path: upstream API path
     :type api_path: URL
-    :param buffer_size: Size of internal Queue, used to store messages from ws,
+    :param buffer_size: Size of internal buffer, used to store messages from ws,
         recommended value is at least the number of workers reading data from the stream
     :type buffer_size: int
+    :param overflow_policy: What to do with received message, when buffer is full, defaults to
+        :attr:`.BufferOverflowPolicy.BLOCK`. Dropped messages are counted, see :meth:`.dropped_messages`.
+    :type overflow_policy: consts.BufferOverflowPolicy
+    :param compress: Window bits for permessage-deflate, offered to the server on connect, defaults to 0 (disabled).
+        Compression saves traffic, but costs CPU time for every frame.
+    :type compress: int
     """
 
-    def __init__(self, access_token: str, session: aiohttp.ClientSession, api_path: URL, buffer_size: int):
+    __slots__ = (
+        "_identifier",
+        "_log_prefix",
+        "_session",
+        "__api_path",
+        "__ws_url",
+        "_compress",
+        "_upstream_buffer",
+        "_overflow_policy",
+        "_dropped_messages",
+        "_stopping",
+        "_ws_close_task",
+        "_closed",
+        "_opened",
+        "_ws",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        access_token: str,
+        session: aiohttp.ClientSession,
+        api_path: URL,
+        buffer_size: int,
+        overflow_policy: consts.BufferOverflowPolicy = consts.BufferOverflowPolicy.BLOCK,
+        compress: int = 0,
+    ):
         self._identifier = os.urandom(8).hex()
+        self._log_prefix = f"ws[{self._identifier}]"
         self._session = session
-        self.__access_token = access_token
         self.__api_path = api_path
+        self.__ws_url = ws_url(api_path, access_token)
+        self._compress = compress
 
-        self._upstream_buffer: asyncio.Queue = asyncio.Queue(buffer_size)
+        self._upstream_buffer: MessageBuffer[domains.UpstreamMessage] = MessageBuffer(buffer_size)
+        self._overflow_policy = consts.BufferOverflowPolicy(overflow_policy)
+        self._dropped_messages = 0
 
-        self._stop_event = asyncio.Event()
+        self._stopping = False
         self._closed: asyncio.Future[t.Optional[str]] = asyncio.Future()
         self._opened = asyncio.Event()
         self._ws: t.Optional[aiohttp.client.ClientWebSocketResponse] = None
+        self._ws_close_task: t.Optional[asyncio.Future] = None
 
-    async def _send_to_ws(self, data: t.Union[str, bytes]) -> bool:
+    async def _send_str(self, data: str) -> bool:
         """
-        Send raw data to websocket.
+        Send raw data to websocket as text frame.
 
         :param data: raw data to send
-        :type data: t.Union[str, bytes]
-        :raises Exception: when websocket is not connected or data format is invalid
+        :type data: str
+        :raises Exception: when websocket is not connected
         :return: Return True on successful sending, otherwise raise exception
         :rtype: bool
         """
         if self.is_closed() or self._ws is None:
-            raise exceptions.UpstreamConnectionClosed(
-                f"ws[{self._identifier}] UpstreamConnection has not yet been established"
-            )
-
-        if isinstance(data, bytes):
-            await self._ws.send_bytes(data)
-        elif isinstance(data, str):
-            await self._ws.send_str(data)
-        else:
-            raise exceptions.UpstreamError(f"ws[{self._identifier}] Try to send wrong data type, expected str or bytes")
+            raise exceptions.UpstreamConnectionClosed(f"{self._log_prefix} {_NOT_ESTABLISHED}")
 
-        logging.debug(f"ws[{self._identifier}] send data {data}")  # type: ignore
+        await self._ws.send_str(data)
+        logging.debug("%s send data %s", self._log_prefix, data)
 
         return True
 
@@ -111,12 +164,17 @@ class UpstreamConnection:
         :rtype: bool
         """
 
+        # Fast path for already valid values: fill prebuilt json template without creating message object.
+        if _is_valid_ack(transaction_id, dev_eui, mic):
+            template = serializers.json.upstream_ack_template(consts.PROTOCOL_VERSION)
+            return await self._send_str(template % (transaction_id, dev_eui, mic))
+
         upstream_ack = domains.UpstreamAckMessage(
             protocol_version=consts.PROTOCOL_VERSION, transaction_id=transaction_id, dev_eui=dev_eui, mic=mic
         )
         data = serializers.json.UpstreamAckMessageSerializer.serialize(upstream_ack)
 
-        return await self._send_to_ws(data)
+        return await self._send_str(data)
 
     async def send_upstream_reject(self, transaction_id: int, result_code: domains.UpstreamRejectResultCode) -> bool:
         """
@@ -143,14 +201,19 @@ class UpstreamConnection:
         :rtype: bool
         """
 
+        # Fast path for already valid values: fill prebuilt json template without creating message object.
+        if _is_valid_reject(transaction_id, result_code):
+            template = serializers.json.upstream_reject_template(consts.PROTOCOL_VERSION, result_code)
+            return await self._send_str(template % transaction_id)
+
         upstream_reject = domains.UpstreamRejectMessage(
             protocol_version=consts.PROTOCOL_VERSION, transaction_id=transaction_id, result_code=result_code
         )
         data = serializers.json.UpstreamRejectMessageSerializer.serialize(upstream_reject)
 
-        return await self._send_to_ws(data)
+        return await self._send_str(data)
 
-    async def stream(self, timeout: int = 1) -> t.AsyncGenerator[domains.UpstreamMessage, None]:
+    def stream(self, timeout: int = 1) -> t.AsyncGenerator[domains.UpstreamMessage, None]:
         """
         Stream of upstream messages from websocket.
         This method ensures you not lose messages in case if some messages already received and stored in messages
@@ -175,22 +238,12 @@ class UpstreamConnection:
                 assert isinstance(message, domains.UpstreamMessage)  # not necessary, just for example
                 await handle_message(message)
 
-        :param timeout: timeout between reading attempts, defaults to 1
+        :param timeout: not used, stream is woken up on new message or connection close. Kept for compatibility.
         :type timeout: int, optional
         :yield: domains.UpstreamMessage
         :rtype: t.AsyncIterator[domains.UpstreamMessage]
         """
-        while not self.is_closed():
-            with suppress(asyncio.TimeoutError):
-                data_message = None
-                async with async_timeout.timeout(timeout):
-                    data_message = await self._upstream_buffer.get()
-                if data_message is not None:
-                    yield data_message
-
-        # Read all items from buffer, when stream already closed.
-        for _ in range(self._upstream_buffer.qsize()):
-            yield await self._upstream_buffer.get()
+        return drain_buffer(self._upstream_buffer)
 
     async def recv(self, timeout: t.Optional[int] = None) -> t.Optional[domains.UpstreamMessage]:
         """
@@ -210,32 +263,11 @@ class UpstreamConnection:
         :rtype: t.Optional[domains.UpstreamMessage]
         """
 
-        # If messages are already in buffer - return them. In other case - check closed state and raise an exception.
-        if not self._upstream_buffer.empty():
-            return await self._upstream_buffer.get()
-
-        if timeout is None:
-            recv_data_task = asyncio.create_task(self._upstream_buffer.get())
-
-            _, pending = await asyncio.wait(
-                {asyncio.create_task(self.wait_closed()), recv_data_task},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-
-            pending_task = pending.pop()
-            pending_task.cancel()
-
-            try:
-                await pending_task
-            except asyncio.CancelledError:
-                pass
-
-            if pending_task != recv_data_task:
-                return recv_data_task.result()
-
-        else:
-            with suppress(asyncio.TimeoutError):
-                return await asyncio.wait_for(self._upstream_buffer.get(), timeout=timeout)
+        message = await recv_from_buffer(
+            self._upstream_buffer, timeout, connecting=not self.is_opened() and not self.is_closed()
+        )
+        if message is not None:
+            return message
 
         return self._raise_on_closed(force_raise_if_closed=True)
 
@@ -250,23 +282,18 @@ class UpstreamConnection:
             raise exceptions.UpstreamError("Connection already established or closed")
 
         listener_task = asyncio.create_task(self._listener())
-
-        _, pending = await asyncio.wait(
-            {listener_task, asyncio.create_task(self._opened.wait())},
-            return_when=asyncio.FIRST_COMPLETED,
-        )
-
-        # If listener stopped then cancel waiter and raise exception
-        pending_task = pending.pop()
-        if pending_task != listener_task:
-            pending_task.cancel()
-
-            # Waiting until task cancelled
-            try:
-                await pending_task
-            except asyncio.CancelledError:
-                pass
-
+        opened_waiter = asyncio.ensure_future(self._opened.wait())
+        try:
+            await asyncio.wait({listener_task, opened_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Waiter is not required anymore, cancel it and wait until task cancelled
+            if not opened_waiter.done():
+                opened_waiter.cancel()
+                with suppress(asyncio.CancelledError):
+                    await opened_waiter
+
+        # If listener stopped then raise exception
+        if listener_task.done():
             # If listener task raised exception then reraise it, otherwise raise UpstreamConnecetionCloseError
             exception = listener_task.exception()
             if exception:
@@ -279,74 +306,119 @@ class UpstreamConnection:
 
         try:
             logging.debug(
-                f"Starting listener for upstream websocket connection ws[{self._identifier}] to"
-                f" {str(self.__api_path)!r}"
+                f"Starting listener for upstream websocket connection {self._log_prefix} to {str(self.__api_path)!r}"
             )
-            query_params = {"access_token": self.__access_token}
-            async with self._session.ws_connect(self.__api_path, params=query_params) as ws:
+            async with self._session.ws_connect(self.__ws_url, compress=self._compress) as ws:
                 self._ws = ws
                 self._opened.set()
-                logging.debug(f"Upstream websocket connection ws[{self._identifier}] established")
-
-                while not self._stop_event.is_set():
-                    with suppress(asyncio.TimeoutError):
-                        ws_msg = await ws.receive(timeout=1)
-
-                        logging.debug(f"Received from upstream ws[{self._identifier}] message: {ws_msg}")
-                        if ws_msg.type in {aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT}:
-                            try:
-                                upstream = serializers.json.UpstreamMessageSerializer.parse(ws_msg.data)
-                            except serializers.ValidationError as e:
-                                logging.error(
-                                    f"Received upstream from ws[{self._identifier}] broken message:"
-                                    f" {ws_msg.data}\r\nErrors: {e.errors()}"
-                                )
-                                continue
-
-                            # NOTE: this method will block thread forever if upstream_buffer is full.
-                            await self._upstream_buffer.put(upstream)
-                        elif ws_msg.type == aiohttp.WSMsgType.CLOSE:
-                            close_result = (
-                                f"Connection closed with ws closed_code: {ws_msg.data}; reason: {ws_msg.extra}"
+                logging.debug(f"Upstream websocket connection {self._log_prefix} established")
+
+                # Local references, used for every received frame
+                parse = serializers.json.UpstreamMessageSerializer.parse
+                upstream_buffer = self._upstream_buffer
+                overflowing = False
+
+                while not self._stopping:
+                    ws_msg = await ws.receive()
+
+                    logging.debug("Received from upstream %s message: %s", self._log_prefix, ws_msg)
+                    msg_type = ws_msg.type
+                    if msg_type is WS_TEXT or msg_type is WS_BINARY:
+                        try:
+                            upstream = parse(ws_msg.data)
+                        except serializers.ValidationError as e:
+                            logging.error(
+                                f"Received upstream from {self._log_prefix} broken message:"
+                                f" {ws_msg.data}\r\nErrors: {e.errors()}"
                             )
-                        elif ws_msg.type == aiohttp.WSMsgType.CLOSED:
-                            if close_result is None:
-                                close_result = "Connection closed due to unknown network reason"
-                            logging.warning(f"ws[{self._identifier}] Connection closed")
-                            return
-
-            logging.debug(f"Stopped listener for upstream websocket connection ws[{self._identifier}]")
+                            continue
+
+                        # Frames, already buffered by aiohttp, are received without suspending, so while there
+                        # is free space in buffer, whole burst is stored before consumers are scheduled.
+                        if not upstream_buffer.full():
+                            upstream_buffer.put_nowait(upstream)
+                            overflowing = False
+                            continue
+
+                        if self._overflow_policy is consts.BufferOverflowPolicy.BLOCK:
+                            # NOTE: this method will block listener until consumer takes message from buffer.
+                            await upstream_buffer.put(upstream)
+                            continue
+
+                        if self._overflow_policy is consts.BufferOverflowPolicy.DROP_OLDEST:
+                            dropped = upstream_buffer.get_nowait()
+                            upstream_buffer.put_nowait(upstream)
+                        else:
+                            dropped = upstream
+                        self._dropped_messages += 1
+                        # Warning is logged once per overflow, which lasts until received message fits into buffer.
+                        # Every dropped message is counted, see dropped_messages().
+                        if not overflowing:
+                            overflowing = True
+                            logging.warning(
+                                "%s Upstream buffer is full, dropping messages (policy: %s)",
+                                self._log_prefix,
+                                self._overflow_policy.value,
+                            )
+                        logging.debug(
+                            "%s Dropped upstream message with transaction_id=%s",
+                            self._log_prefix,
+                            dropped.transaction_id,
+                        )
+                    elif msg_type is WS_CLOSE:
+                        close_result = f"Connection closed with ws closed_code: {ws_msg.data}; reason: {ws_msg.extra}"
+                    elif msg_type is WS_CLOSED:
+                        if close_result is None:
+                            close_result = "Connection closed due to unknown network reason"
+                        logging.warning(f"{self._log_prefix} Connection closed")
+                        return
+
+            logging.debug(f"Stopped listener for upstream websocket connection {self._log_prefix}")
         except aiohttp.client_exceptions.WSServerHandshakeError as e:
             if e.status == 401:
                 close_result = "Unauthorized. Incorrect access_token sent."
 
-                logging.error(f"Unauthorized. Incorrect access_token sent. ws[{self._identifier}]")
+                logging.error(f"Unauthorized. Incorrect access_token sent. {self._log_prefix}")
             else:
                 close_result = f"Connection closed due to unhandled handshake error: {e}"
 
                 logging.exception(
-                    f"Catch unhandled handshake error in listener of websocket connection ws[{self._identifier}]:"
+                    f"Catch unhandled handshake error in listener of websocket connection {self._log_prefix}:"
                 )
         except aiohttp.ClientConnectionError as e:
-            logging.exception(f"Catch unhandled error in listener of websocket connection ws[{self._identifier}]:")
+            logging.exception(f"Catch unhandled error in listener of websocket connection {self._log_prefix}:")
             close_result = f"Connection closed due to {e}"
             logging.error(f"aiohttp.ClientSession closed: {e}")
         except Exception:
             close_result = "Connection closed due to internal error"
             raise
         finally:
+            await wait_ws_close(self._ws_close_task, self._log_prefix)
+
             self._opened.clear()
             self._ws = None
             self._closed.set_result(close_result)
+            self._upstream_buffer.close()
 
-            logging.debug(f"Closed event set for upstream websocket connection ws[{self._identifier}]")
+            logging.debug(f"Closed event set for upstream websocket connection {self._log_prefix}")
 
     def close(self) -> None:
         """
         Close upstream connection.
         """
-        self._stop_event.set()
-        logging.debug(f"Closing upstream connection ws[{self._identifier}]")
+        self._stopping = True
+        if self._ws_close_task is None:
+            self._ws_close_task = schedule_ws_close(self._ws)
+        logging.debug(f"Closing upstream connection {self._log_prefix}")
+
+    def dropped_messages(self) -> int:
+        """
+        Method returns amount of received messages, dropped because of full buffer.
+
+        :return: Amount of dropped messages
+        :rtype: int
+        """
+        return self._dropped_messages
 
     def is_opened(self) -> bool:
         """
@@ -382,10 +454,10 @@ class UpstreamConnection:
 
         # TODO: custom exceptions
         if not self._ws:
-            raise Exception(f"UpstreamConnection has not yet been established ws[{self._identifier}]")
+            raise Exception(f"{_NOT_ESTABLISHED} {self._log_prefix}")
 
         await self._closed
-        logging.debug(f"Upstream connection closed ws[{self._identifier}]")
+        logging.debug(f"Upstream connection closed {self._log_prefix}")
 
     async def __aenter__(self):
         await self.connect()
@@ -1,22 +1,50 @@
 import aiohttp
 from yarl import URL
 
+from . import consts
 from .connection import UpstreamConnection
 
 
 class UpstreamConnectionManager:
+    """
+    Factory of :class:`.UpstreamConnection` objects. All connections, created by one manager, share single
+    :class:`aiohttp.ClientSession` and its connection pool, so session must outlive all created connections.
+
+    :param access_token: access token for upstream API
+    :type access_token: str
+    :param session: shared ClientSession object
+    :type session: aiohttp.ClientSession
+    :param api_path: upstream API path
+    :type api_path: URL
+    """
+
     def __init__(self, access_token: str, session: aiohttp.ClientSession, api_path: URL):
         self.__access_token = access_token
         self.__session = session
         self.__api_path = api_path
 
-    async def create_connection(self, buffer_size: int = 1) -> UpstreamConnection:
-        upstream_connection = UpstreamConnection(
-            self.__access_token, self.__session, self.__api_path, buffer_size=buffer_size
-        )
+    async def create_connection(
+        self,
+        buffer_size: int = 1,
+        overflow_policy: consts.BufferOverflowPolicy = consts.BufferOverflowPolicy.BLOCK,
+        compress: int = 0,
+    ) -> UpstreamConnection:
+        upstream_connection = self(buffer_size=buffer_size, overflow_policy=overflow_policy, compress=compress)
         await upstream_connection.connect()
 
         return upstream_connection
 
-    def __call__(self, buffer_size: int = 1) -> UpstreamConnection:
-        return UpstreamConnection(self.__access_token, self.__session, self.__api_path, buffer_size=buffer_size)
+    def __call__(
+        self,
+        buffer_size: int = 1,
+        overflow_policy: consts.BufferOverflowPolicy = consts.BufferOverflowPolicy.BLOCK,
+        compress: int = 0,
+    ) -> UpstreamConnection:
+        return UpstreamConnection(
+            self.__access_token,
+            self.__session,
+            self.__api_path,
+            buffer_size=buffer_size,
+            overflow_policy=overflow_policy,
+            compress=compress,
+        )
@@ -1 +1,13 @@
+from enum import Enum
+
 PROTOCOL_VERSION = 1  #: Default protocol version
+
+
+class BufferOverflowPolicy(str, Enum):
+    """
+    Behaviour of upstream listener, when received message does not fit into the full buffer.
+    """
+
+    BLOCK = "block"  #: Stop reading websocket until consumer takes message from buffer
+    DROP_NEW = "drop_new"  #: Drop received message, warning is logged once per overflow
+    DROP_OLDEST = "drop_oldest"  #: Replace oldest buffered message, warning is logged once per overflow
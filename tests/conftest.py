@@ -1,16 +1,12 @@
 import asyncio
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from aiohttp.http_websocket import WS_CLOSED_MESSAGE, WSMessage, WSMsgType
-
-from ran.routing.core import Core
-from ran.routing.core.domains import (
-    DownstreamAckMessage,
-    DownstreamMessage,
-    DownstreamResultMessage,
-    UpstreamMessage,
-)
+from aiohttp.http_websocket import WS_CLOSED_MESSAGE, WS_CLOSING_MESSAGE, WSMessage, WSMsgType
+
+from ran.routing.core import Core, serializers
+from ran.routing.core.domains import DownstreamAckMessage, DownstreamMessage, DownstreamResultMessage, UpstreamMessage
 from ran.routing.core.serializers.json import (
     DownstreamAckOrResultSerializer,
     DownstreamMessageSerializer,
@@ -20,66 +16,97 @@ from ran.routing.core.serializers.json import (
 # - - -
 
 
-@pytest.fixture(scope="function")
-def client_session_ws(request):
-    # Usage examples:
-    # @pytest.mark.parametrize("client_session_ws", ["some packed json"], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [b"some packed json"], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [UpstreamMessage(...)], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [DownstreamMessage(...)], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [DownstreamAckMessage(...)], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [DownstreamResultMessage(...)], indirect=True)
-    # @pytest.mark.parametrize("client_session_ws", [WSMessage(...)], indirect=True)
+class _FakeWS:
+    """
+    Minimal stand-in for aiohttp.ClientWebSocketResponse, exposing only methods used by connections.
+    """
 
-    ws_mock = MagicMock()
-    ws_mock.shutdown = asyncio.Event()
-    ws_mock.recvd_messages = []
-    ws_mock.sent_messages = []
+    def __init__(self, messages: list):
+        self.shutdown = asyncio.Event()
+        self.closed = False
+        self.recvd_messages = []
+        self.sent_messages = []
+        # Frame type of every sent message, TEXT for send_str() and BINARY for send_bytes()
+        self.sent_frame_types = []
+        # Buffer for messages to be sent
+        self._messages = []
 
-    # Buffer for messages to be sent
-    messages = []
-    if hasattr(request, "param"):
         # Magic for handling different types of messages
-        for param_msg in request.param:
-            ws_mock.recvd_messages.append(param_msg)
+        for param_msg in messages:
+            self.recvd_messages.append(param_msg)
             if isinstance(param_msg, UpstreamMessage):
-                messages.append(
+                self._messages.append(
                     WSMessage(type=WSMsgType.TEXT, data=UpstreamMessageSerializer.serialize(param_msg), extra=None)
                 )
             elif isinstance(param_msg, DownstreamMessage):
-                messages.append(
+                self._messages.append(
                     WSMessage(type=WSMsgType.TEXT, data=DownstreamMessageSerializer.serialize(param_msg), extra=None)
                 )
             elif isinstance(param_msg, (DownstreamAckMessage, DownstreamResultMessage)):
-                messages.append(
+                self._messages.append(
                     WSMessage(
                         type=WSMsgType.TEXT, data=DownstreamAckOrResultSerializer.serialize(param_msg), extra=None
                     )
                 )
             elif isinstance(param_msg, WSMessage):
-                messages.append(param_msg)
+                self._messages.append(param_msg)
             elif isinstance(param_msg, str):
-                messages.append(WSMessage(type=WSMsgType.TEXT, data=param_msg, extra=None))
+                self._messages.append(WSMessage(type=WSMsgType.TEXT, data=param_msg, extra=None))
             elif isinstance(param_msg, bytes):
-                messages.append(WSMessage(WSMsgType.BINARY, data=param_msg, extra=None))
+                self._messages.append(WSMessage(WSMsgType.BINARY, data=param_msg, extra=None))
 
-    async def receive(timeout):
-        if len(messages):
-            return messages.pop()
-        # Receiver will block, until someone calls "ws_mock.shutdown.set()"
+    async def receive(self, timeout=None):
+        if len(self._messages):
+            return self._messages.pop()
+        # Receiver will block, until someone calls "ws.shutdown.set()" or closes websocket.
         # This is required to prevent listener to close connection too early.
         # After unblocking, listener will receive WS_CLOSED_MESSAGE, it will cause graceful shutdown of listener
-        await ws_mock.shutdown.wait()
+        await self.shutdown.wait()
+        if self.closed:
+            return WS_CLOSING_MESSAGE
         return WS_CLOSED_MESSAGE
 
-    def send(data):
-        ws_mock.sent_messages.append(data)
+    async def send_str(self, data):
+        self.sent_messages.append(data)
+        self.sent_frame_types.append(WSMsgType.TEXT)
 
-    ws_mock.receive = AsyncMock(side_effect=receive)
-    ws_mock.send_str = AsyncMock(side_effect=send)
-    ws_mock.send_bytes = AsyncMock(side_effect=send)
+    async def send_bytes(self, data):
+        self.sent_messages.append(data)
+        self.sent_frame_types.append(WSMsgType.BINARY)
 
-    return ws_mock
+    async def close(self):
+        # Like aiohttp, closing websocket wakes up pending receive() with WS_CLOSING_MESSAGE
+        self.closed = True
+        self.shutdown.set()
+        return True
+
+
+@pytest.fixture(scope="function")
+def client_session_ws(request):
+    # Usage examples:
+    # @pytest.mark.parametrize("client_session_ws", ["some packed json"], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [b"some packed json"], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [UpstreamMessage(...)], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [DownstreamMessage(...)], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [DownstreamAckMessage(...)], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [DownstreamResultMessage(...)], indirect=True)
+    # @pytest.mark.parametrize("client_session_ws", [WSMessage(...)], indirect=True)
+    return _FakeWS(getattr(request, "param", []))
+
+
+@pytest.fixture(scope="function", params=["orjson", "json"])
+def json_backend(request, monkeypatch):
+    # Runs test with both JSON backends, orjson is optional and stdlib json is used without it.
+    # Usage example:
+    # pytestmark = pytest.mark.usefixtures("json_backend")
+    if request.param == "orjson":
+        orjson = pytest.importorskip("orjson")
+        monkeypatch.setattr(serializers.json, "json_dumps", serializers.json.orjson_dumps)
+        monkeypatch.setattr(serializers.json, "json_loads", orjson.loads)
+    else:
+        monkeypatch.setattr(serializers.json, "json_dumps", serializers.json.stdlib_json_dumps)
+        monkeypatch.setattr(serializers.json, "json_loads", json.loads)
+    return request.param
 
 
 @pytest.fixture(scope="function")
@@ -90,6 +117,48 @@ def client_session(client_session_ws):
     return mock
 
 
+class _FakeResponse:
+    """
+    Minimal stand-in for aiohttp.ClientResponse, used as "async with session.post(...) as response".
+    """
+
+    def __init__(self, ok: bool, status: int, json_data):
+        self.ok = ok
+        self.status = status
+        self._json_data = json_data
+
+    async def json(self):
+        return self._json_data
+
+    async def text(self):
+        return str(self._json_data)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+
+def _configure_response(request_mock, *, ok=True, status=200, json=None):
+    # Request mock still records calls, only response is replaced with plain object
+    response = _FakeResponse(ok, status, json)
+    request_mock.return_value = response
+    return response
+
+
+@pytest.fixture(scope="function")
+def configure_post(client_session):
+    # Usage example:
+    # configure_post(ok=False, status=422, json={"detail": {"error_code": api_error}})
+    return lambda **kwargs: _configure_response(client_session.post, **kwargs)
+
+
+@pytest.fixture(scope="function")
+def configure_get(client_session):
+    return lambda **kwargs: _configure_response(client_session.get, **kwargs)
+
+
 @pytest.fixture(scope="function")
 async def core(client_session):
     with patch("aiohttp.ClientSession", lambda *a, **kw: client_session):
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from ran.routing.core.buffer import BufferClosed, MessageBuffer
+
+
+@pytest.mark.asyncio
+async def test_buffer_fifo():
+    buffer: MessageBuffer[int] = MessageBuffer(3)
+    for i in range(3):
+        buffer.put_nowait(i)
+
+    assert buffer.full()
+    assert buffer.qsize() == 3
+    assert [await buffer.get() for _ in range(3)] == [0, 1, 2]
+    assert buffer.empty()
+
+
+@pytest.mark.asyncio
+async def test_buffer_get_waits_for_put():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    getter = asyncio.create_task(buffer.get())
+    await asyncio.sleep(0)
+    assert not getter.done()
+
+    await buffer.put(1)
+    assert await getter == 1
+
+
+@pytest.mark.asyncio
+async def test_buffer_put_waits_for_get():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    await buffer.put(1)
+    putter = asyncio.create_task(buffer.put(2))
+    await asyncio.sleep(0)
+    assert not putter.done()
+
+    assert buffer.get_nowait() == 1
+    await putter
+    assert buffer.get_nowait() == 2
+
+
+@pytest.mark.asyncio
+async def test_buffer_cancelled_getter():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(buffer.get(), timeout=0.01)
+
+    getter = asyncio.create_task(buffer.get())
+    await asyncio.sleep(0)
+    buffer.put_nowait(1)
+    assert await getter == 1
+
+
+def test_buffer_nowait_errors():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    with pytest.raises(asyncio.QueueEmpty):
+        buffer.get_nowait()
+
+    buffer.put_nowait(1)
+    with pytest.raises(asyncio.QueueFull):
+        buffer.put_nowait(2)
+
+
+@pytest.mark.asyncio
+async def test_buffer_close_wakes_getter():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    getter = asyncio.create_task(buffer.get())
+    await asyncio.sleep(0)
+
+    buffer.close()
+    with pytest.raises(BufferClosed):
+        await getter
+
+
+@pytest.mark.asyncio
+async def test_buffer_close_keeps_items():
+    buffer: MessageBuffer[int] = MessageBuffer(1)
+    buffer.put_nowait(1)
+    buffer.close()
+
+    assert await buffer.get() == 1
+    with pytest.raises(BufferClosed):
+        await buffer.get()
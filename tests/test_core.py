@@ -1,5 +1,6 @@
 from unittest.mock import AsyncMock, patch
 
+import aiohttp
 import pytest
 
 from ran.routing.core import Core
@@ -135,3 +136,33 @@ async def test_double_close_with_exc():
 
     with pytest.raises(Exception):
         await core.close(raise_exception=True)
+
+
+@pytest.mark.asyncio
+async def test_core_custom_connector():
+    connector = object()
+    with patch("aiohttp.ClientSession") as client_session:
+        client_session.return_value.close = AsyncMock()
+        async with Core("token", url="https://dev.cloud.dev.everynet.io/api/v1.0", connector=connector):
+            pass
+
+    assert client_session.call_args.kwargs["connector"] is connector
+    assert client_session.call_args.kwargs["connector_owner"] is False
+
+
+@pytest.mark.asyncio
+async def test_core_custom_connector_reconnect():
+    connector = aiohttp.TCPConnector()
+    core = Core("token", url="https://dev.cloud.dev.everynet.io/api/v1.0", connector=connector)
+
+    await core.connect()
+    await core.close()
+    assert not connector.closed
+
+    # Core can be connected again with the same connector
+    await core.connect()
+    assert not core._Core__session.closed
+    assert core._Core__session.connector is connector
+    await core.close()
+
+    await connector.close()
@@ -1,6 +1,8 @@
+import asyncio
 import json
 
 import pytest
+from aiohttp import WSMsgType
 
 from ran.routing.core import Core
 from ran.routing.core.domains import (
@@ -10,6 +12,16 @@ from ran.routing.core.domains import (
     DownstreamResultMessage,
     MulticastDownstreamMessage,
 )
+from ran.routing.core.downstream.exceptions import DownstreamConnectionClosed
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+# Tests only read these, never mutate
+_TX_WINDOW = {"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}}
+_EXPECTED_TX_WINDOW = {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1}
+_PHY_PAYLOAD = b"fff"
+# Bytes are serialized as list of ints
+_EXPECTED_PHY_PAYLOAD = list(_PHY_PAYLOAD)
 
 
 @pytest.mark.asyncio
@@ -19,121 +31,70 @@ async def test_downstream_creation(core: Core, client_session, client_session_ws
         client_session_ws.shutdown.set()
 
     assert client_session.ws_connect.called
+    # permessage-deflate is not offered by default
+    assert client_session.ws_connect.call_args.kwargs["compress"] == 0
 
 
 @pytest.mark.asyncio
 async def test_downstream_creation_ctx(core: Core, client_session, client_session_ws):
-    conn = await core.downstream.create_connection()
+    conn = await core.downstream.create_connection(compress=15)
     # Will stop listener
     client_session_ws.shutdown.set()
     conn.close()
     await conn.wait_closed()
 
     assert client_session.ws_connect.called
+    assert client_session.ws_connect.call_args.kwargs["compress"] == 15
 
 
 @pytest.mark.asyncio
-async def test_downstream_send_downstream_ctx(core: Core, client_session_ws):
-    async with core.downstream() as downstream_conn:
-        await downstream_conn.send_downstream(
-            transaction_id=1,
-            dev_eui=1,
-            tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-            phy_payload=b"fff",
-        )
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {
-                "ProtocolVersion": 1,
-                "TransactionID": 1,
-                "DevEUI": 1,
-                "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-                "PHYPayload": [102, 102, 102],
-            }
-        )
-        # Will stop listener
-        client_session_ws.shutdown.set()
-
-
-@pytest.mark.asyncio
-async def test_downstream_send_downstream(core: Core, client_session_ws):
-    downstream_conn = await core.downstream.create_connection()
-    await downstream_conn.send_downstream(
-        transaction_id=1,
-        dev_eui=1,
-        tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-        phy_payload=b"fff",
-    )
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {
-            "ProtocolVersion": 1,
-            "TransactionID": 1,
-            "DevEUI": 1,
-            "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-            "PHYPayload": [102, 102, 102],
-        }
-    )
-    # Unblocking listener
-    client_session_ws.shutdown.set()
-
-    downstream_conn.close()
-    await downstream_conn.wait_closed()
-
-
-@pytest.mark.asyncio
-async def test_downstream_send_downstream_obj_ctx(core: Core, client_session_ws):
-    async with core.downstream() as downstream_conn:
-        await downstream_conn.send_downstream_object(
-            DownstreamMessage.parse_obj(
-                dict(
-                    protocol_version=1,
-                    transaction_id=1,
-                    dev_eui=1,
-                    tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-                    phy_payload=b"fff",
-                )
-            )
-        )
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {
-                "ProtocolVersion": 1,
-                "TransactionID": 1,
-                "DevEUI": 1,
-                "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-                "PHYPayload": [102, 102, 102],
-            }
-        )
-        # Will stop listener
+@pytest.mark.parametrize("use_ctx", [True, False])
+@pytest.mark.parametrize("use_object", [True, False])
+@pytest.mark.parametrize(
+    "message_cls,send_method,addr_field,addr_key",
+    [
+        (DownstreamMessage, "send_downstream", "dev_eui", "DevEUI"),
+        (MulticastDownstreamMessage, "send_multicast_downstream", "addr", "Addr"),
+    ],
+)
+async def test_downstream_send(
+    core: Core, client_session_ws, use_ctx, use_object, message_cls, send_method, addr_field, addr_key
+):
+    message = {
+        "transaction_id": 1,
+        addr_field: 1,
+        "tx_window": _TX_WINDOW,
+        "phy_payload": _PHY_PAYLOAD,
+    }
+
+    async def send(downstream_conn):
+        if use_object:
+            await downstream_conn.send_downstream_object(message_cls.parse_obj(dict(protocol_version=1, **message)))
+        else:
+            await getattr(downstream_conn, send_method)(**message)
+
+    if use_ctx:
+        async with core.downstream() as downstream_conn:
+            await send(downstream_conn)
+            # Will stop listener
+            client_session_ws.shutdown.set()
+    else:
+        downstream_conn = await core.downstream.create_connection()
+        await send(downstream_conn)
+        # Unblocking listener
         client_session_ws.shutdown.set()
 
+        downstream_conn.close()
+        await downstream_conn.wait_closed()
 
-@pytest.mark.asyncio
-async def test_downstream_send_downstream_obj(core: Core, client_session_ws):
-    downstream_conn = await core.downstream.create_connection()
-    await downstream_conn.send_downstream_object(
-        DownstreamMessage.parse_obj(
-            dict(
-                protocol_version=1,
-                transaction_id=1,
-                dev_eui=1,
-                tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-                phy_payload=b"fff",
-            )
-        )
-    )
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {
-            "ProtocolVersion": 1,
-            "TransactionID": 1,
-            "DevEUI": 1,
-            "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-            "PHYPayload": [102, 102, 102],
-        }
-    )
-    # Unblocking listener
-    client_session_ws.shutdown.set()
-
-    downstream_conn.close()
-    await downstream_conn.wait_closed()
+    assert client_session_ws.sent_frame_types == [WSMsgType.TEXT]
+    assert json.loads(client_session_ws.sent_messages[0]) == {
+        "ProtocolVersion": 1,
+        "TransactionID": 1,
+        addr_key: 1,
+        "TxWindow": _EXPECTED_TX_WINDOW,
+        "PHYPayload": _EXPECTED_PHY_PAYLOAD,
+    }
 
 
 @pytest.mark.asyncio
@@ -186,109 +147,13 @@ async def test_downstream_stream_result(core: Core, client_session_ws):
             assert msg == client_session_ws.recvd_messages[0]
 
 
-# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-# Multicast downstream
-
-
-@pytest.mark.asyncio
-async def test_downstream_send_multicast_downstream_ctx(core: Core, client_session_ws):
-    async with core.downstream() as downstream_conn:
-        await downstream_conn.send_multicast_downstream(
-            transaction_id=1,
-            addr=1,
-            tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-            phy_payload=b"fff",
-        )
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {
-                "ProtocolVersion": 1,
-                "TransactionID": 1,
-                "Addr": 1,
-                "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-                "PHYPayload": [102, 102, 102],
-            }
-        )
-        # Will stop listener
-        client_session_ws.shutdown.set()
-
-
-@pytest.mark.asyncio
-async def test_downstream_send_multicast_downstream(core: Core, client_session_ws):
-    downstream_conn = await core.downstream.create_connection()
-    await downstream_conn.send_multicast_downstream(
-        transaction_id=1,
-        addr=1,
-        tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-        phy_payload=b"fff",
-    )
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {
-            "ProtocolVersion": 1,
-            "TransactionID": 1,
-            "Addr": 1,
-            "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-            "PHYPayload": [102, 102, 102],
-        }
-    )
-    # Unblocking listener
-    client_session_ws.shutdown.set()
-
-    downstream_conn.close()
-    await downstream_conn.wait_closed()
-
-
-@pytest.mark.asyncio
-async def test_downstream_send_multicast_downstream_obj_ctx(core: Core, client_session_ws):
-    async with core.downstream() as downstream_conn:
-        await downstream_conn.send_downstream_object(
-            MulticastDownstreamMessage.parse_obj(
-                dict(
-                    protocol_version=1,
-                    transaction_id=1,
-                    addr=1,
-                    tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-                    phy_payload=b"fff",
-                )
-            )
-        )
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {
-                "ProtocolVersion": 1,
-                "TransactionID": 1,
-                "Addr": 1,
-                "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-                "PHYPayload": [102, 102, 102],
-            }
-        )
-        # Will stop listener
-        client_session_ws.shutdown.set()
-
-
 @pytest.mark.asyncio
-async def test_downstream_send_multicast_downstream_obj(core: Core, client_session_ws):
+async def test_downstream_recv_interrupted_by_close(core: Core, client_session_ws):
     downstream_conn = await core.downstream.create_connection()
-    await downstream_conn.send_downstream_object(
-        MulticastDownstreamMessage.parse_obj(
-            dict(
-                protocol_version=1,
-                transaction_id=1,
-                addr=1,
-                tx_window={"delay": 1, "radio": {"frequency": 868300000, "lora": {"spreading": 1, "bandwidth": 1}}},
-                phy_payload=b"fff",
-            )
-        )
-    )
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {
-            "ProtocolVersion": 1,
-            "TransactionID": 1,
-            "Addr": 1,
-            "TxWindow": {"Radio": {"Frequency": 868300000, "LoRa": {"Spreading": 1, "Bandwidth": 1}}, "Delay": 1},
-            "PHYPayload": [102, 102, 102],
-        }
-    )
-    # Unblocking listener
+    recv_task = asyncio.create_task(downstream_conn.recv())
+    await asyncio.sleep(0)
+    # Listener will receive WS_CLOSED_MESSAGE and close connection
     client_session_ws.shutdown.set()
 
-    downstream_conn.close()
-    await downstream_conn.wait_closed()
+    with pytest.raises(DownstreamConnectionClosed):
+        await recv_task
@@ -22,7 +22,7 @@ def _multicast_group_factory(*, created_at=None, name=None, addr=None, devices=N
         "addr": f"{addr:08x}" if addr is not None else None,
         "devices": devices,
     }
-    multicast_group_model = TestMulticastGroup(
+    multicast_group_model = TestMulticastGroup.construct(
         created_at=created_at,
         name=name,
         addr=addr,
@@ -4,6 +4,9 @@ from ran.routing.core import Core
 from ran.routing.core.multicast_groups import exceptions
 from ran.routing.core.multicast_groups.consts import ApiErrorCode
 
+# Multicast group name is limited to 255 characters
+_LONG_NAME = "x" * 256
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Positive scenarios
 
@@ -17,12 +20,10 @@ from ran.routing.core.multicast_groups.consts import ApiErrorCode
     ],
     indirect=True,
 )
-async def test_multicast_groups_create_group(core: Core, client_session, multicast_group):
+async def test_multicast_groups_create_group(core: Core, client_session, multicast_group, configure_post):
     multicast_group_dict, multicast_group_model = multicast_group
 
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 201
-    client_session.post.return_value.__aenter__.return_value.json.return_value = multicast_group_dict
+    configure_post(ok=True, status=201, json=multicast_group_dict)
 
     multicast_group = await core.multicast_groups.create_multicast_group(
         name=multicast_group_model.name,
@@ -41,7 +42,7 @@ async def test_multicast_groups_create_group(core: Core, client_session, multica
     [
         {"addr": 0xFFFFFFFF + 1, "name": "test1"},
         {"addr": 0x0 - 1, "name": "test2"},
-        {"addr": 0xFFFFFFFF, "name": "x" * 256},
+        {"addr": 0xFFFFFFFF, "name": _LONG_NAME},
     ],
     indirect=True,
 )
@@ -65,12 +66,12 @@ async def test_multicast_groups_create_group_parameter_error(core: Core, multica
         (ApiErrorCode.MC_ALREADY_EXISTS, exceptions.ApiMulticastGroupAlreadyExistsError),
     ],
 )
-async def test_multicast_groups_create_group_api_error(core: Core, client_session, multicast_group, api_error, exception):
+async def test_multicast_groups_create_group_api_error(
+    core: Core, client_session, multicast_group, api_error, exception, configure_post
+):
     multicast_group_dict, multicast_group_model = multicast_group
 
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 400
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+    configure_post(ok=False, status=400, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         multicast_group = await core.multicast_groups.create_multicast_group(
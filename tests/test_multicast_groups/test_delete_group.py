@@ -15,12 +15,10 @@ from ran.routing.core.multicast_groups.consts import ApiErrorCode
         ([], []),
         ([0xFFFFFFFF], ["ffffffff"]),
         ([0xFFFFFFFE, 0xFFFFFFFF], ["fffffffe", "ffffffff"]),
-    ]
+    ],
 )
-async def test_multicast_groups_delete(core: Core, client_session, delete_args, delete_body):
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 200
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"deleted": 1}
+async def test_multicast_groups_delete(core: Core, client_session, delete_args, delete_body, configure_post):
+    configure_post(ok=True, status=200, json={"deleted": 1})
 
     deleted = await core.multicast_groups.delete_multicast_groups(addrs=delete_args)
     client_session.post.assert_called_with(
@@ -36,7 +34,7 @@ async def test_multicast_groups_delete(core: Core, client_session, delete_args,
         "TEST",
         -1,
         0xFFFFFFFF + 10,
-    ]
+    ],
 )
 async def test_multicast_groups_delete_parameter_error(core: Core, delete_arg):
     with pytest.raises(exceptions.ParameterError):
@@ -53,10 +51,8 @@ async def test_multicast_groups_delete_parameter_error(core: Core, delete_arg):
         (ApiErrorCode.MC_NOT_FOUND, exceptions.ApiMulticastGroupNotFoundError),
     ],
 )
-async def test_multicast_groups_delete_api_error(core: Core, client_session, api_error, exception):
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 400
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_multicast_groups_delete_api_error(core: Core, client_session, api_error, exception, configure_post):
+    configure_post(ok=False, status=400, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.multicast_groups.delete_multicast_groups(addrs=[0xFFFFFFFF])
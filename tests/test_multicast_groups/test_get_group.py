@@ -6,11 +6,9 @@ from ran.routing.core.multicast_groups.consts import ApiErrorCode
 
 
 @pytest.mark.asyncio
-async def test_multicast_groups_select(core: Core, client_session, make_multicast_group):
+async def test_multicast_groups_select(core: Core, client_session, make_multicast_group, configure_post):
     multicast_group_dict, multicast_group_model = make_multicast_group(addr=0xFFFFFFFF, name="test")
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.json.return_value = [multicast_group_dict]
-    client_session.post.return_value.__aenter__.return_value.status = 200
+    configure_post(ok=True, json=[multicast_group_dict], status=200)
 
     multicast_groups = await core.multicast_groups.get_multicast_groups(0xFFFFFFFF)
     client_session.post.assert_called_with(
@@ -36,10 +34,8 @@ async def test_multicast_groups_select_parameter_error(core: Core, select_id):
         (ApiErrorCode.MC_NOT_FOUND, exceptions.ApiMulticastGroupNotFoundError),
     ],
 )
-async def test_multicast_groups_select_api_error(core: Core, client_session, api_error, exception):
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 400
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_multicast_groups_select_api_error(core: Core, client_session, api_error, exception, configure_post):
+    configure_post(ok=False, status=400, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.multicast_groups.get_multicast_groups()
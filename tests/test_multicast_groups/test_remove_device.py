@@ -10,10 +10,8 @@ from ran.routing.core.multicast_groups.consts import ApiErrorCode
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("dev_eui", [0xFFFFFFFFFFFFFFFF])
-async def test_multicast_groups_remove_device(core: Core, client_session, dev_eui):
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 201
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"is_removed": 1}
+async def test_multicast_groups_remove_device(core: Core, client_session, dev_eui, configure_post):
+    configure_post(ok=True, status=201, json={"is_removed": 1})
 
     is_created = await core.multicast_groups.remove_device_from_multicast_group(addr=0xFFFFFFFF, dev_eui=dev_eui)
     client_session.post.assert_called_with(
@@ -33,9 +31,7 @@ async def test_multicast_groups_remove_device_parameter_error(core: Core, dev_eu
 @pytest.mark.asyncio
 async def test_multicast_groups_remove_device_parameter_error_id(core: Core):
     with pytest.raises(exceptions.ParameterError):
-        await core.multicast_groups.remove_device_from_multicast_group(
-            addr="TEST", dev_eui=0xFFFFFFFFFFFFFFFF
-        )
+        await core.multicast_groups.remove_device_from_multicast_group(addr="TEST", dev_eui=0xFFFFFFFFFFFFFFFF)
 
 
 @pytest.mark.asyncio
@@ -50,10 +46,10 @@ async def test_multicast_groups_remove_device_parameter_error_id(core: Core):
     ],
 )
 @pytest.mark.parametrize("dev_eui", [0xFFFFFFFFFFFFFFFF])
-async def test_multicast_groups_remove_device_api_error(core: Core, client_session, dev_eui, api_error, exception):
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 400
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_multicast_groups_remove_device_api_error(
+    core: Core, client_session, dev_eui, api_error, exception, configure_post
+):
+    configure_post(ok=False, status=400, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.multicast_groups.remove_device_from_multicast_group(addr=0xFFFFFFFF, dev_eui=dev_eui)
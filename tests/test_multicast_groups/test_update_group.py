@@ -4,6 +4,9 @@ from ran.routing.core import Core
 from ran.routing.core.multicast_groups import exceptions
 from ran.routing.core.multicast_groups.consts import ApiErrorCode
 
+# Multicast group name is limited to 255 characters
+_LONG_NAME = "x" * 256
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Positive scenarios
 
@@ -17,12 +20,10 @@ from ran.routing.core.multicast_groups.consts import ApiErrorCode
     ],
     indirect=True,
 )
-async def test_multicast_groups_update_group(core: Core, client_session, multicast_group):
+async def test_multicast_groups_update_group(core: Core, client_session, multicast_group, configure_post):
     multicast_group_dict, multicast_group_model = multicast_group
 
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 201
-    client_session.post.return_value.__aenter__.return_value.json.return_value = multicast_group_dict
+    configure_post(ok=True, status=201, json=multicast_group_dict)
 
     multicast_group = await core.multicast_groups.update_multicast_group(
         addr=0xFFFFFFFF,
@@ -47,11 +48,11 @@ async def test_multicast_groups_update_group(core: Core, client_session, multica
         {"addr": None, "name": None},
         {"addr": 0xFFFFFFFF + 1, "name": "test1"},
         {"addr": 0x0 - 1, "name": "test2"},
-        {"addr": 0xFFFFFFFF, "name": "x" * 256},
+        {"addr": 0xFFFFFFFF, "name": _LONG_NAME},
     ],
     indirect=True,
 )
-async def test_multicast_groups_update_group_parameter_error(core: Core, client_session, multicast_group):
+async def test_multicast_groups_update_group_parameter_error(core: Core, multicast_group):
     multicast_group_dict, multicast_group_model = multicast_group
     with pytest.raises(exceptions.ParameterError):
         multicast_group = await core.multicast_groups.update_multicast_group(
@@ -73,13 +74,11 @@ async def test_multicast_groups_update_group_parameter_error(core: Core, client_
     ],
 )
 async def test_multicast_groups_update_group_api_error(
-    core: Core, client_session, multicast_group, api_error, exception
+    core: Core, client_session, multicast_group, api_error, exception, configure_post
 ):
     multicast_group_dict, multicast_group_model = multicast_group
 
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 400
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+    configure_post(ok=False, status=400, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         multicast_group = await core.multicast_groups.update_multicast_group(
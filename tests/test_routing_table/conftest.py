@@ -27,7 +27,7 @@ def _device_factory(*, dev_eui=None, join_eui=None, active_dev_addr=None, target
         "TargetDevAddr": None if target_dev_addr is None else f"{target_dev_addr:0x}",
         "Details": details,
     }
-    device_model = TestDevice(
+    device_model = TestDevice.construct(
         created_at=created_at,
         dev_eui=dev_eui,
         join_eui=join_eui,
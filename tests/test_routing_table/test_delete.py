@@ -4,20 +4,20 @@ from ran.routing.core import Core
 from ran.routing.core.routing_table.consts import ApiErrorCode
 from ran.routing.core.routing_table import exceptions
 
+_DEV_EUIS = [0xFFFFFFFFFFFFFFFF]
+_EXPECTED_DELETE_BODY = {"DevEUIs": ["ffffffffffffffff"]}
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Positive scenarios
 
 
 @pytest.mark.asyncio
-async def test_routing_table_delete(core: Core, client_session):
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 200
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"deleted": 1}
+async def test_routing_table_delete(core: Core, client_session, configure_post):
+    configure_post(ok=True, status=200, json={"deleted": 1})
 
-    dev_euis = [0xFFFFFFFFFFFFFFFF]
-    deleted = await core.routing_table.delete(dev_euis=dev_euis)
+    deleted = await core.routing_table.delete(dev_euis=_DEV_EUIS)
     client_session.post.assert_called_with(
-        core._Core__api_endpoint_schema.routing / "devices/drop", json={"DevEUIs": [f"{d:016x}" for d in dev_euis]}
+        core._Core__api_endpoint_schema.routing / "devices/drop", json=_EXPECTED_DELETE_BODY
     )
     assert deleted == 1
 
@@ -27,7 +27,7 @@ async def test_routing_table_delete(core: Core, client_session):
 
 
 @pytest.mark.asyncio
-@pytest.mark.parametrize("dev_eui", [0xFFFFFFFFFFFFFFFF + 1])
+@pytest.mark.parametrize("dev_eui", ["some_string", -1, 0xFFFFFFFFFFFFFFFF + 1])
 async def test_routing_table_delete_parameter_error(core: Core, client_session, dev_eui):
     dev_euis = [dev_eui]
     with pytest.raises(exceptions.ParameterError):
@@ -44,28 +44,32 @@ async def test_routing_table_delete_parameter_error(core: Core, client_session,
         (ApiErrorCode.VALIDATION_FAILED, exceptions.ApiValidationFailedError),
     ],
 )
-async def test_routing_table_delete_api_error(core: Core, client_session, api_error, exception):
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 422
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_routing_table_delete_api_error(core: Core, client_session, api_error, exception, configure_post):
+    configure_post(ok=False, status=422, json={"detail": {"error_code": api_error}})
 
-    dev_euis = [0xFFFFFFFFFFFFFFFF]
     with pytest.raises(exception):
-        await core.routing_table.delete(dev_euis=dev_euis)
+        await core.routing_table.delete(dev_euis=_DEV_EUIS)
     client_session.post.assert_called_with(
-        core._Core__api_endpoint_schema.routing / "devices/drop", json={"DevEUIs": [f"{d:016x}" for d in dev_euis]}
+        core._Core__api_endpoint_schema.routing / "devices/drop", json=_EXPECTED_DELETE_BODY
     )
 
 
+@pytest.mark.asyncio
+async def test_routing_table_delete_server_error(core: Core, client_session, configure_post):
+    # Responses outside of 4xx range are not parsed, raw body is passed to exception
+    configure_post(ok=False, status=500, json="Internal Server Error")
+
+    with pytest.raises(exceptions.ApiUnknownError):
+        await core.routing_table.delete(dev_euis=_DEV_EUIS)
+
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Positive scenarios
 
 
 @pytest.mark.asyncio
-async def test_routing_table_delete_all(core: Core, client_session):
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 200
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"deleted": 100}
+async def test_routing_table_delete_all(core: Core, client_session, configure_post):
+    configure_post(ok=True, status=200, json={"deleted": 100})
 
     deleted = await core.routing_table.delete_all()
     client_session.post.assert_called_with(core._Core__api_endpoint_schema.routing / "devices/drop-all")
@@ -85,10 +89,10 @@ async def test_routing_table_delete_all(core: Core, client_session):
         (ApiErrorCode.VALIDATION_FAILED, exceptions.ApiValidationFailedError),
     ],
 )
-async def test_routing_table_delete_all_remote_api_error(core: Core, client_session, api_error, exception):
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 422
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_routing_table_delete_all_remote_api_error(
+    core: Core, client_session, api_error, exception, configure_post
+):
+    configure_post(ok=False, status=422, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.routing_table.delete_all()
@@ -5,21 +5,21 @@ from ran.routing.core.domains import Device
 from ran.routing.core.routing_table import exceptions
 from ran.routing.core.routing_table.consts import ApiErrorCode
 
+# Device fields, which are not accepted by insert method / not sent in insert request body
+_INSERT_SKIPPED_PARAMS = frozenset({"created_at", "target_dev_addr", "details"})
+_INSERT_SKIPPED_KEYS = frozenset({"CreatedAt", "TargetDevAddr"})
+
 
 def device_as_insert_params(device: Device):
     # Preparing insert method params
-    params = device.dict()
-    for key in ("created_at", "target_dev_addr", "details"):
-        if key in params:
-            params.pop(key)
-
+    params = {k: v for k, v in device.dict().items() if k not in _INSERT_SKIPPED_PARAMS}
     if "active_dev_addr" in params:
         params["dev_addr"] = params.pop("active_dev_addr")
     return params
 
 
 def device_dict_as_insert_dict(device_dict):
-    data = {k: v for k, v in device_dict.items() if k not in ("CreatedAt", "TargetDevAddr") and v is not None}
+    data = {k: v for k, v in device_dict.items() if k not in _INSERT_SKIPPED_KEYS and v is not None}
     if "ActiveDevAddr" in data:
         data["DevAddr"] = data.pop("ActiveDevAddr")
     return data
@@ -38,12 +38,10 @@ def device_dict_as_insert_dict(device_dict):
     ],
     indirect=True,
 )
-async def test_routing_table_insert(core: Core, client_session, device):
+async def test_routing_table_insert(core: Core, client_session, device, configure_post):
     device_dict, device_model = device
 
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 201
-    client_session.post.return_value.__aenter__.return_value.json.return_value = device_dict
+    configure_post(ok=True, status=201, json=device_dict)
 
     device = await core.routing_table.insert(**device_as_insert_params(device_model))
     client_session.post.assert_called_with(
@@ -56,29 +54,36 @@ async def test_routing_table_insert(core: Core, client_session, device):
 # Negative scenarios
 
 
+# Valid insert params for ABP and OTAA devices
+_ABP_PARAMS = {"dev_eui": 0xFFFFFFFFFFFFFFFF, "dev_addr": 0xFFFFFFFF}
+_OTAA_PARAMS = {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF}
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "device",
+    "params, field, value",
     [
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF + 1, "active_dev_addr": 0xFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": 0xFFFFFFFF + 1},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF + 1, "join_eui": 0xFFFFFFFFFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF + 1},
-        {"dev_eui": -1, "active_dev_addr": 0xFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": -1},
-        {"dev_eui": -1, "join_eui": 0xFFFFFFFFFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": -1},
-        # {"dev_eui": "random_string", "active_dev_addr": 0xFFFFFFFF},
-        # {"dev_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": "random_string"},
-        # {"dev_eui": "random_string", "join_eui": 0xFFFFFFFFFFFFFFFF},
-        # {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": "random_string"},
+        (_ABP_PARAMS, "dev_eui", 0xFFFFFFFFFFFFFFFF + 1),
+        (_ABP_PARAMS, "dev_addr", 0xFFFFFFFF + 1),
+        (_OTAA_PARAMS, "dev_eui", 0xFFFFFFFFFFFFFFFF + 1),
+        (_OTAA_PARAMS, "join_eui", 0xFFFFFFFFFFFFFFFF + 1),
+        (_ABP_PARAMS, "dev_eui", -1),
+        (_ABP_PARAMS, "dev_addr", -1),
+        (_OTAA_PARAMS, "dev_eui", -1),
+        (_OTAA_PARAMS, "join_eui", -1),
+        (_ABP_PARAMS, "dev_eui", "random_string"),
+        (_ABP_PARAMS, "dev_addr", "random_string"),
+        (_OTAA_PARAMS, "dev_eui", "random_string"),
+        (_OTAA_PARAMS, "join_eui", "random_string"),
+        # bool is an int subclass, but not a valid identifier
+        (_ABP_PARAMS, "dev_eui", True),
+        (_OTAA_PARAMS, "dev_eui", True),
     ],
-    indirect=True,
 )
-async def test_routing_table_insert_param_error(core: Core, client_session, device):
-    device_dict, device_model = device
+async def test_routing_table_insert_param_error(core: Core, client_session, params, field, value):
     with pytest.raises(exceptions.ParameterError):
-        await core.routing_table.insert(**device_as_insert_params(device_model))
+        await core.routing_table.insert(**{**params, field: value})
+    assert not client_session.post.called
 
 
 @pytest.mark.asyncio
@@ -97,12 +102,10 @@ async def test_routing_table_insert_param_error(core: Core, client_session, devi
         (ApiErrorCode.DEVICES_LIMIT_EXHAUSTED, exceptions.ApiDevicesLimitExhaustedError),
     ],
 )
-async def test_routing_table_insert_api_error(core: Core, client_session, device, api_error, exception):
+async def test_routing_table_insert_api_error(core: Core, client_session, device, api_error, exception, configure_post):
     device_dict, device_model = device
 
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 422
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+    configure_post(ok=False, status=422, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.routing_table.insert(**device_as_insert_params(device_model))
@@ -9,11 +9,9 @@ from ran.routing.core.routing_table import exceptions
 
 
 @pytest.mark.asyncio
-async def test_routing_table_select(core: Core, client_session, make_device):
+async def test_routing_table_select(core: Core, client_session, make_device, configure_get):
     device_dict, device_model = make_device(dev_eui=0x7ABE1B8C93D7174F, active_dev_addr=0xFF92D2A8)
-    client_session.get.return_value.__aenter__.return_value.ok = True
-    client_session.get.return_value.__aenter__.return_value.json.return_value = [device_dict]
-    client_session.get.return_value.__aenter__.return_value.status = 200
+    configure_get(ok=True, status=200, json=[device_dict])
 
     devices = await core.routing_table.select()
     client_session.get.assert_called_with(core._Core__api_endpoint_schema.routing / "devices/select", params={})
@@ -21,11 +19,9 @@ async def test_routing_table_select(core: Core, client_session, make_device):
 
 
 @pytest.mark.asyncio
-async def test_routing_table_select_offset(core: Core, client_session, make_device):
+async def test_routing_table_select_offset(core: Core, client_session, make_device, configure_get):
     device_dict, device_model = make_device(dev_eui=0x7ABE1B8C93D7174F, active_dev_addr=0xFF92D2A8)
-    client_session.get.return_value.__aenter__.return_value.ok = True
-    client_session.get.return_value.__aenter__.return_value.json.return_value = [device_dict]
-    client_session.get.return_value.__aenter__.return_value.status = 200
+    configure_get(ok=True, status=200, json=[device_dict])
 
     devices = await core.routing_table.select(offset=1)
     client_session.get.assert_called_with(
@@ -35,11 +31,9 @@ async def test_routing_table_select_offset(core: Core, client_session, make_devi
 
 
 @pytest.mark.asyncio
-async def test_routing_table_select_limit(core: Core, client_session, make_device):
+async def test_routing_table_select_limit(core: Core, client_session, make_device, configure_get):
     device_dict, device_model = make_device(dev_eui=0x7ABE1B8C93D7174F, active_dev_addr=0xFF92D2A8)
-    client_session.get.return_value.__aenter__.return_value.ok = True
-    client_session.get.return_value.__aenter__.return_value.json.return_value = [device_dict]
-    client_session.get.return_value.__aenter__.return_value.status = 200
+    configure_get(ok=True, status=200, json=[device_dict])
 
     devices = await core.routing_table.select(limit=1)
     client_session.get.assert_called_with(
@@ -49,11 +43,9 @@ async def test_routing_table_select_limit(core: Core, client_session, make_devic
 
 
 @pytest.mark.asyncio
-async def test_routing_table_select_dev_euis(core: Core, client_session, make_device):
+async def test_routing_table_select_dev_euis(core: Core, client_session, make_device, configure_get):
     device_dict, device_model = make_device(dev_eui=0x7ABE1B8C93D7174F, active_dev_addr=0xFF92D2A8)
-    client_session.get.return_value.__aenter__.return_value.ok = True
-    client_session.get.return_value.__aenter__.return_value.json.return_value = [device_dict]
-    client_session.get.return_value.__aenter__.return_value.status = 200
+    configure_get(ok=True, status=200, json=[device_dict])
 
     devices = await core.routing_table.select(dev_euis=[0x7ABE1B8C93D7174F])
     client_session.get.assert_called_with(
@@ -94,10 +86,8 @@ async def test_routing_table_select_offset_parameter_error(core: Core):
         (ApiErrorCode.VALIDATION_FAILED, exceptions.ApiValidationFailedError),
     ],
 )
-async def test_routing_table_select_api_error(core: Core, client_session, api_error, exception):
-    client_session.get.return_value.__aenter__.return_value.ok = False
-    client_session.get.return_value.__aenter__.return_value.status = 422
-    client_session.get.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+async def test_routing_table_select_api_error(core: Core, client_session, api_error, exception, configure_get):
+    configure_get(ok=False, status=422, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.routing_table.select()
@@ -47,12 +47,10 @@ def device_dict_as_update_dict(device_dict):
     ],
     indirect=True,
 )
-async def test_routing_table_update(core: Core, client_session, device):
+async def test_routing_table_update(core: Core, client_session, device, configure_post):
     device_dict, device_model = device
 
-    client_session.post.return_value.__aenter__.return_value.ok = True
-    client_session.post.return_value.__aenter__.return_value.status = 200
-    client_session.post.return_value.__aenter__.return_value.json.return_value = device_dict
+    configure_post(ok=True, status=200, json=device_dict)
 
     device = await core.routing_table.update(**device_as_update_params(device_model))
     client_session.post.assert_called_with(
@@ -65,32 +63,30 @@ async def test_routing_table_update(core: Core, client_session, device):
 # Negative scenarios
 
 
+# Valid update params
+_UPDATE_PARAMS = {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": 0xFFFFFFFF}
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "device",
+    "field, value",
     [
         # Important fields is None
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": 0xFFFFFFFF},
-        {"join_eui": 0xFFFFFFFFFFFFFFFF, "target_dev_addr": 0xFFFFFFFF},
+        ("dev_eui", None),
+        ("join_eui", None),
         # Not provided active or target dev addr
-        {
-            "dev_eui": 0xFFFFFFFFFFFFFFFF,
-            "join_eui": 0xFFFFFFFFFFFFFFFF,
-            "active_dev_addr": None,
-            "target_dev_addr": None,
-        },
+        ("active_dev_addr", None),
         # Wrong values
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF + 1, "join_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": 0xFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF + 1, "active_dev_addr": 0xFFFFFFFF},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF, "active_dev_addr": 0xFFFFFFFF + 1},
-        {"dev_eui": 0xFFFFFFFFFFFFFFFF, "join_eui": 0xFFFFFFFFFFFFFFFF, "target_dev_addr": 0xFFFFFFFF + 1},
+        ("dev_eui", 0xFFFFFFFFFFFFFFFF + 1),
+        ("join_eui", 0xFFFFFFFFFFFFFFFF + 1),
+        ("active_dev_addr", 0xFFFFFFFF + 1),
+        ("target_dev_addr", 0xFFFFFFFF + 1),
     ],
-    indirect=True,
 )
-async def test_routing_table_update_parameter_error(core: Core, client_session, device):
-    device_dict, device_model = device
+async def test_routing_table_update_parameter_error(core: Core, client_session, field, value):
     with pytest.raises(exceptions.ParameterError):
-        await core.routing_table.update(**device_as_update_params(device_model))
+        await core.routing_table.update(**{**_UPDATE_PARAMS, field: value})
+    assert not client_session.post.called
 
 
 @pytest.mark.asyncio
@@ -108,12 +104,12 @@ async def test_routing_table_update_parameter_error(core: Core, client_session,
         (ApiErrorCode.DEVICE_NOT_FOUND, exceptions.ApiDeviceNotFoundError),
     ],
 )
-async def test_routing_table_update_remote_api_error(core: Core, client_session, device, api_error, exception):
+async def test_routing_table_update_remote_api_error(
+    core: Core, client_session, device, api_error, exception, configure_post
+):
     device_dict, device_model = device
 
-    client_session.post.return_value.__aenter__.return_value.ok = False
-    client_session.post.return_value.__aenter__.return_value.status = 422
-    client_session.post.return_value.__aenter__.return_value.json.return_value = {"detail": {"error_code": api_error}}
+    configure_post(ok=False, status=422, json={"detail": {"error_code": api_error}})
 
     with pytest.raises(exception):
         await core.routing_table.update(**device_as_update_params(device_model))
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from ran.routing.core import domains
+from ran.routing.core.serializers.json import (
+    UpstreamAckMessageSerializer,
+    UpstreamMessageSerializer,
+    UpstreamRejectMessageSerializer,
+    upstream_ack_template,
+    upstream_reject_template,
+)
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+
+def test_upstream_message_roundtrip():
+    message = domains.UpstreamMessage(
+        protocol_version=1,
+        transaction_id=1,
+        dev_euis=[0x7ABE1B8C93D7174F],
+        radio=domains.UpstreamRadio(
+            frequency=868100000, lora=domains.LoRaModulation(spreading=12, bandwidth=125000), rssi=-50.0, snr=2.0
+        ),
+        phy_payload_no_mic=[0, 244, 104, 139],
+        mic_challenge=[0xAA595854],
+    )
+    data = UpstreamMessageSerializer.serialize(message)
+
+    assert isinstance(data, str)
+    assert UpstreamMessageSerializer.parse(data) == message
+    assert UpstreamMessageSerializer.parse(data.encode()) == message
+
+
+def test_serialize_compact():
+    message = domains.UpstreamAckMessage(protocol_version=1, transaction_id=1, dev_eui=2, mic=3)
+
+    assert (
+        UpstreamAckMessageSerializer.serialize(message) == '{"ProtocolVersion":1,"TransactionID":1,"DevEUI":2,"MIC":3}'
+    )
+
+
+def test_ack_template_matches_serializer():
+    message = domains.UpstreamAckMessage(protocol_version=1, transaction_id=1, dev_eui=0xFFFFFFFFFFFFFFFF, mic=3)
+
+    assert upstream_ack_template(1) % (1, 0xFFFFFFFFFFFFFFFF, 3) == UpstreamAckMessageSerializer.serialize(message)
+
+
+@pytest.mark.parametrize("result_code", list(domains.UpstreamRejectResultCode))
+def test_reject_template_matches_serializer(result_code):
+    message = domains.UpstreamRejectMessage(protocol_version=1, transaction_id=1, result_code=result_code)
+    data = upstream_reject_template(1, result_code) % 1
+
+    assert data == UpstreamRejectMessageSerializer.serialize(message)
+    assert json.loads(data)["ResultCode"] == result_code.value
@@ -1,9 +1,47 @@
+import asyncio
 import json
+import logging
+import typing as t
+from unittest.mock import MagicMock
 
 import pytest
+from aiohttp import WSMsgType, WSServerHandshakeError
 
 from ran.routing.core import Core
 from ran.routing.core.domains import Gps, LoRaModulation, UpstreamMessage, UpstreamRadio, UpstreamRejectResultCode
+from ran.routing.core.serializers import ValidationError
+from ran.routing.core.upstream.consts import BufferOverflowPolicy
+from ran.routing.core.upstream.exceptions import UpstreamConnectionClosed, UpstreamConnectionClosedAbnormally
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+# Expected payloads of send_upstream_ack(transaction_id=1, dev_eui=1, mic=1) and
+# send_upstream_reject(transaction_id=1, result_code=UpstreamRejectResultCode.MICFailed)
+_EXPECTED_ACK = {"ProtocolVersion": 1, "TransactionID": 1, "DevEUI": 1, "MIC": 1}
+_EXPECTED_REJECT = {"ProtocolVersion": 1, "TransactionID": 1, "ResultCode": "MICFailed"}
+
+
+def _upstream_message(transaction_id: int, phy_payload_no_mic: t.Optional[t.List[int]] = None) -> UpstreamMessage:
+    if phy_payload_no_mic is None:
+        phy_payload_no_mic = [0, 244, 104, 139, 79, 98, 207, 237, 60, 79, 23, 215, 147, 140, 27, 190, 122, 0, 0]
+
+    return UpstreamMessage(
+        protocol_version=1,
+        transaction_id=transaction_id,
+        outdated=None,
+        dev_euis=[0x7ABE1B8C93D7174F],
+        radio=UpstreamRadio(
+            frequency=868100000,
+            lora=LoRaModulation(spreading=12, bandwidth=125000),
+            fsk=None,
+            fhss=None,
+            rssi=-50.0,
+            snr=2.0,
+        ),
+        phy_payload_no_mic=phy_payload_no_mic,
+        mic_challenge=[0xAA595854],
+        gps=Gps(lat=51.178889, lng=-1.826111, alt=None),
+    )
 
 
 @pytest.mark.asyncio
@@ -13,43 +51,27 @@ async def test_upstream_creation(core: Core, client_session, client_session_ws):
         client_session_ws.shutdown.set()
 
     assert client_session.ws_connect.called
+    # permessage-deflate is not offered by default
+    assert client_session.ws_connect.call_args.kwargs["compress"] == 0
+    assert client_session.ws_connect.call_args.args[0].query["access_token"] == "token"
 
 
 @pytest.mark.asyncio
 async def test_upstream_creation_ctx(core: Core, client_session, client_session_ws):
-    conn = await core.upstream.create_connection()
+    conn = await core.upstream.create_connection(compress=15)
     # Will stop listener
     client_session_ws.shutdown.set()
     conn.close()
     await conn.wait_closed()
 
     assert client_session.ws_connect.called
+    assert client_session.ws_connect.call_args.kwargs["compress"] == 15
 
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "client_session_ws",
-    [
-        (
-            UpstreamMessage(
-                protocol_version=1,
-                transaction_id=1,
-                outdated=None,
-                dev_euis=[0x7ABE1B8C93D7174F],
-                radio=UpstreamRadio(
-                    frequency=868100000,
-                    lora=LoRaModulation(spreading=12, bandwidth=125000),
-                    fsk=None,
-                    fhss=None,
-                    rssi=-50.0,
-                    snr=2.0,
-                ),
-                phy_payload_no_mic=[0, 244, 104, 139, 79, 98, 207, 237, 60, 79, 23, 215, 147, 140, 27, 190, 122, 0, 0],
-                mic_challenge=[0xAA595854],
-                gps=Gps(lat=51.178889, lng=-1.826111, alt=None),
-            ),
-        )
-    ],
+    [(_upstream_message(1),)],
     indirect=True,
 )
 async def test_upstream_stream_basic_receive(core: Core, client_session_ws):
@@ -65,27 +87,7 @@ async def test_upstream_stream_basic_receive(core: Core, client_session_ws):
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "client_session_ws",
-    [
-        (
-            UpstreamMessage(
-                protocol_version=1,
-                transaction_id=1,
-                outdated=None,
-                dev_euis=[0x7ABE1B8C93D7174F],
-                radio=UpstreamRadio(
-                    frequency=868100000,
-                    lora=LoRaModulation(spreading=12, bandwidth=125000),
-                    fsk=None,
-                    fhss=None,
-                    rssi=-50.0,
-                    snr=2.0,
-                ),
-                phy_payload_no_mic=[0, 244, 104, 139, 79, 98, 207, 237, 60, 79, 23, 215, 147, 140, 27, 190, 122, 0, 0],
-                mic_challenge=[0xAA595854],
-                gps=Gps(lat=51.178889, lng=-1.826111, alt=None),
-            ),
-        )
-    ],
+    [(_upstream_message(1),)],
     indirect=True,
 )
 async def test_upstream_stream_recv_send_ack(core: Core, client_session_ws):
@@ -99,40 +101,18 @@ async def test_upstream_stream_recv_send_ack(core: Core, client_session_ws):
             await upstream_conn.send_upstream_ack(
                 transaction_id=msg.transaction_id, dev_eui=msg.dev_euis[0], mic=msg.mic_challenge[0]
             )
-            assert client_session_ws.sent_messages[0] == json.dumps(
-                {
-                    "ProtocolVersion": 1,
-                    "TransactionID": msg.transaction_id,
-                    "DevEUI": msg.dev_euis[0],
-                    "MIC": msg.mic_challenge[0],
-                }
-            )
+            assert json.loads(client_session_ws.sent_messages[0]) == {
+                "ProtocolVersion": 1,
+                "TransactionID": msg.transaction_id,
+                "DevEUI": msg.dev_euis[0],
+                "MIC": msg.mic_challenge[0],
+            }
 
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "client_session_ws",
-    [
-        (
-            UpstreamMessage(
-                protocol_version=1,
-                transaction_id=1,
-                outdated=None,
-                dev_euis=[0x7ABE1B8C93D7174F],
-                radio=UpstreamRadio(
-                    frequency=868100000,
-                    lora=LoRaModulation(spreading=12, bandwidth=125000),
-                    fsk=None,
-                    fhss=None,
-                    rssi=-50.0,
-                    snr=2.0,
-                ),
-                phy_payload_no_mic=[0, 244, 104, 139, 79, 98, 207, 237, 60, 79, 23, 215, 147, 140, 27, 190, 122, 0, 0],
-                mic_challenge=[0xAA595854],
-                gps=Gps(lat=51.178889, lng=-1.826111, alt=None),
-            ),
-        )
-    ],
+    [(_upstream_message(1),)],
     indirect=True,
 )
 async def test_upstream_stream_recv_send_reject(core: Core, client_session_ws):
@@ -147,23 +127,15 @@ async def test_upstream_stream_recv_send_reject(core: Core, client_session_ws):
                 transaction_id=msg.transaction_id,
                 result_code=UpstreamRejectResultCode.MICFailed,
             )
-            assert client_session_ws.sent_messages[0] == json.dumps(
-                {"ProtocolVersion": 1, "TransactionID": 1, "ResultCode": "MICFailed"}
-            )
+            assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_REJECT
 
 
 @pytest.mark.asyncio
 async def test_upstream_send_ack_no_stream(core: Core, client_session_ws):
     upstream_conn = await core.upstream.create_connection()
     await upstream_conn.send_upstream_ack(transaction_id=1, dev_eui=1, mic=1)
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {
-            "ProtocolVersion": 1,
-            "TransactionID": 1,
-            "DevEUI": 1,
-            "MIC": 1,
-        }
-    )
+    assert client_session_ws.sent_frame_types == [WSMsgType.TEXT]
+    assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_ACK
     # Unblocking listener
     client_session_ws.shutdown.set()
 
@@ -175,14 +147,7 @@ async def test_upstream_send_ack_no_stream(core: Core, client_session_ws):
 async def test_upstream_send_ack_no_stream_ctx(core: Core, client_session_ws):
     async with core.upstream() as upstream_conn:
         await upstream_conn.send_upstream_ack(transaction_id=1, dev_eui=1, mic=1)
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {
-                "ProtocolVersion": 1,
-                "TransactionID": 1,
-                "DevEUI": 1,
-                "MIC": 1,
-            }
-        )
+        assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_ACK
         upstream_conn.close()
         # After this, listener task will exit, so we don't want to call "upstream_conn.wait_closed()"
         client_session_ws.shutdown.set()
@@ -192,9 +157,8 @@ async def test_upstream_send_ack_no_stream_ctx(core: Core, client_session_ws):
 async def test_upstream_send_reject_no_stream(core: Core, client_session_ws):
     upstream_conn = await core.upstream.create_connection()
     await upstream_conn.send_upstream_reject(transaction_id=1, result_code=UpstreamRejectResultCode.MICFailed)
-    assert client_session_ws.sent_messages[0] == json.dumps(
-        {"ProtocolVersion": 1, "TransactionID": 1, "ResultCode": "MICFailed"}
-    )
+    assert client_session_ws.sent_frame_types == [WSMsgType.TEXT]
+    assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_REJECT
     # Unblocking listener
     client_session_ws.shutdown.set()
 
@@ -206,9 +170,148 @@ async def test_upstream_send_reject_no_stream(core: Core, client_session_ws):
 async def test_upstream_send_reject_no_stream_ctx(core: Core, client_session_ws):
     async with core.upstream() as upstream_conn:
         await upstream_conn.send_upstream_reject(transaction_id=1, result_code=UpstreamRejectResultCode.MICFailed)
-        assert client_session_ws.sent_messages[0] == json.dumps(
-            {"ProtocolVersion": 1, "TransactionID": 1, "ResultCode": "MICFailed"}
-        )
+        assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_REJECT
         upstream_conn.close()
         # After this, listener task will exit, so we don't want to call "upstream_conn.wait_closed()"
         client_session_ws.shutdown.set()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "client_session_ws",
+    [(_upstream_message(1, phy_payload_no_mic=[255] * 2048),)],
+    indirect=True,
+)
+async def test_upstream_stream_receive_large_message(core: Core, client_session_ws):
+    async with core.upstream() as upstream_conn:
+        client_session_ws.shutdown.set()
+
+        async for msg in upstream_conn.stream():
+            assert msg == client_session_ws.recvd_messages[0]
+
+
+@pytest.mark.asyncio
+async def test_upstream_send_ack_invalid_mic(core: Core, client_session_ws):
+    async with core.upstream() as upstream_conn:
+        with pytest.raises(ValidationError):
+            await upstream_conn.send_upstream_ack(transaction_id=1, dev_eui=1, mic=0xFFFFFFFF + 1)
+        assert not client_session_ws.sent_messages
+        upstream_conn.close()
+        client_session_ws.shutdown.set()
+
+
+@pytest.mark.asyncio
+async def test_upstream_send_reject_str_result_code(core: Core, client_session_ws):
+    async with core.upstream() as upstream_conn:
+        await upstream_conn.send_upstream_reject(transaction_id=1, result_code="MICFailed")
+        # Slow path, message is built and serialized
+        assert client_session_ws.sent_frame_types == [WSMsgType.TEXT]
+        assert json.loads(client_session_ws.sent_messages[0]) == _EXPECTED_REJECT
+        upstream_conn.close()
+        client_session_ws.shutdown.set()
+
+
+@pytest.mark.asyncio
+async def test_upstream_connect_unauthorized(core: Core, client_session):
+    client_session.ws_connect.return_value.__aenter__.side_effect = WSServerHandshakeError(MagicMock(), (), status=401)
+
+    with pytest.raises(UpstreamConnectionClosedAbnormally, match="Unauthorized"):
+        await core.upstream.create_connection()
+
+
+@pytest.mark.asyncio
+async def test_upstream_recv_interrupted_by_close(core: Core, client_session_ws):
+    upstream_conn = await core.upstream.create_connection()
+    recv_task = asyncio.create_task(upstream_conn.recv())
+    await asyncio.sleep(0)
+    # Listener will receive WS_CLOSED_MESSAGE and close connection
+    client_session_ws.shutdown.set()
+
+    with pytest.raises(UpstreamConnectionClosed):
+        await recv_task
+
+
+@pytest.mark.asyncio
+async def test_upstream_close_wakes_listener(core: Core, client_session_ws):
+    upstream_conn = await core.upstream.create_connection()
+    # Listener is blocked in receive(), close() must wake it up without any incoming frame
+    upstream_conn.close()
+    await asyncio.wait_for(upstream_conn.wait_closed(), timeout=0.5)
+
+    assert client_session_ws.closed
+    assert upstream_conn.is_closed()
+
+
+@pytest.mark.asyncio
+async def test_upstream_wait_closed_awaits_ws_close(core: Core, client_session_ws):
+    ws_close = client_session_ws.close
+    ws_close_finished = asyncio.Event()
+
+    async def slow_ws_close():
+        # Listener is woken up immediately, but closing handshake takes a while
+        await ws_close()
+        await asyncio.sleep(0.01)
+        ws_close_finished.set()
+
+    client_session_ws.close = slow_ws_close
+    upstream_conn = await core.upstream.create_connection()
+    upstream_conn.close()
+    await upstream_conn.wait_closed()
+
+    assert ws_close_finished.is_set()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_session_ws", [(_upstream_message(1), _upstream_message(2))], indirect=True)
+async def test_upstream_overflow_drop_new(core: Core, client_session_ws):
+    async with core.upstream(buffer_size=1, overflow_policy=BufferOverflowPolicy.DROP_NEW) as upstream_conn:
+        client_session_ws.shutdown.set()
+
+        received = [msg async for msg in upstream_conn.stream()]
+
+    # Fake websocket sends messages in reversed order, so second one is dropped
+    assert [msg.transaction_id for msg in received] == [2]
+    assert upstream_conn.dropped_messages() == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_session_ws", [(_upstream_message(1), _upstream_message(2))], indirect=True)
+async def test_upstream_overflow_drop_oldest(core: Core, client_session_ws):
+    async with core.upstream(buffer_size=1, overflow_policy=BufferOverflowPolicy.DROP_OLDEST) as upstream_conn:
+        client_session_ws.shutdown.set()
+
+        received = [msg async for msg in upstream_conn.stream()]
+
+    # Fake websocket sends messages in reversed order, so first received one is dropped
+    assert [msg.transaction_id for msg in received] == [1]
+    assert upstream_conn.dropped_messages() == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "client_session_ws", [(_upstream_message(1), _upstream_message(2), _upstream_message(3))], indirect=True
+)
+async def test_upstream_overflow_warns_once(core: Core, client_session_ws, caplog):
+    with caplog.at_level(logging.WARNING):
+        async with core.upstream(buffer_size=1, overflow_policy=BufferOverflowPolicy.DROP_NEW) as upstream_conn:
+            client_session_ws.shutdown.set()
+
+            received = [msg async for msg in upstream_conn.stream()]
+
+    assert len(received) == 1
+    assert upstream_conn.dropped_messages() == 2
+    assert len([r for r in caplog.records if "buffer is full" in r.getMessage()]) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client_session_ws", [(_upstream_message(1), _upstream_message(2))], indirect=True)
+async def test_upstream_stream_send_acks_concurrently(core: Core, client_session_ws):
+    async with core.upstream(buffer_size=2) as upstream_conn:
+        acks = []
+        async for msg in upstream_conn.stream():
+            acks.append(upstream_conn.send_upstream_ack(msg.transaction_id, msg.dev_euis[0], msg.mic_challenge[0]))
+            if len(acks) == 2:
+                break
+        assert await asyncio.gather(*acks) == [True, True]
+
+    assert sorted(json.loads(sent)["TransactionID"] for sent in client_session_ws.sent_messages) == [1, 2]